@@ -0,0 +1,94 @@
+"""Compare bytes written per frame by the rich ``Live`` path and ``DiffScreen``.
+
+Run with ``python benchmarks/frame_bytes.py``.
+"""
+
+import io
+import math
+import time
+
+from rich.console import Console
+from rich.live import Live
+from rich.text import Text
+
+from plot.plot import generate_plot
+from plot.screen import DiffScreen
+
+COLUMNS = 120
+LINES = 50
+HEIGHT = 30
+WINDOW = 200
+FRAMES = 300
+
+
+class CountingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.bytes_written = 0
+
+    def write(self, data: str) -> int:
+        self.bytes_written += len(data.encode())
+        return super().write(data)
+
+    def isatty(self) -> bool:
+        return True
+
+
+def _frames() -> list[str]:
+    values = [50 + 40 * math.sin(i / 15) for i in range(WINDOW + FRAMES)]
+    frames = []
+    for index in range(FRAMES):
+        window = values[index : index + WINDOW]
+        times = [float(t) for t in range(index, index + WINDOW)]
+        rendered = generate_plot(
+            title="Benchmark",
+            legends=["value"],
+            series=[window],
+            time=times,
+            height=HEIGHT,
+            y_min=min(window),
+            y_max=max(window),
+            width=COLUMNS - 8,
+        )
+        line = f"value={window[-1]:.2f}"
+        frames.append(f"{rendered}\n\n{line}\n\n{' [RUNNING] '.center(COLUMNS)}")
+    return frames
+
+
+def bench_live(frames: list[str]) -> tuple[int, float]:
+    stream = CountingStream()
+    console = Console(
+        file=stream,
+        force_terminal=True,
+        width=COLUMNS,
+        height=LINES,
+        color_system="truecolor",
+    )
+    started = time.perf_counter()
+    with Live(console=console, auto_refresh=False) as live:
+        for frame in frames:
+            live.update(Text.from_ansi(frame), refresh=True)
+    return stream.bytes_written, time.perf_counter() - started
+
+
+def bench_diff(frames: list[str]) -> tuple[int, float]:
+    stream = CountingStream()
+    started = time.perf_counter()
+    with DiffScreen(stream) as screen:
+        for frame in frames:
+            screen.update(frame, columns=COLUMNS, lines=LINES)
+    return screen.bytes_written, time.perf_counter() - started
+
+
+def main() -> None:
+    frames = _frames()
+    for name, bench in (("rich Live", bench_live), ("DiffScreen", bench_diff)):
+        written, elapsed = bench(frames)
+        print(
+            f"{name:>10}: {written / len(frames):9.0f} bytes/frame"
+            f"  {elapsed / len(frames) * 1000:7.3f} ms/frame"
+        )
+
+
+if __name__ == "__main__":
+    main()
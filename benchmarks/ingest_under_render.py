@@ -0,0 +1,77 @@
+"""Check that ingestion keeps up while the render thread is busy drawing.
+
+Feeds ``LINES`` short lines through ``render_plot`` with a slowed-down
+rasterizer and counts, from the tracer's spans, how many lines made it into
+the history and how many frames were drawn.
+
+Run with ``python benchmarks/ingest_under_render.py``.
+"""
+
+import asyncio
+import io
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.argv = sys.argv[:1]
+
+import plot.plot
+from plot.capture import KeyEvent, KeyStroke
+from plot.collect import InputLine
+from plot.console import stdout
+from plot.prompts import ExtractSpec, PlotSpec
+from plot.settings import AppSettings
+from plot.trace import tracer
+
+LINES = 200_000
+DRAW_SECONDS = 0.02
+
+_generate_plot = plot.plot.generate_plot
+
+
+def _slow_generate_plot(**kwargs: object) -> str:
+    deadline = time.perf_counter() + DRAW_SECONDS
+    while time.perf_counter() < deadline:
+        pass
+    return _generate_plot(**kwargs)
+
+
+async def _run() -> float:
+    plot_spec = PlotSpec(
+        title="Benchmark",
+        extracts=[ExtractSpec(name="cpu", regex=r"cpu=(\d+\.\d+)")],
+    )
+    queue: asyncio.Queue[InputLine | KeyStroke | None] = asyncio.Queue()
+    now = time.time()
+    for index in range(LINES):
+        queue.put_nowait(InputLine(now + index / 1000, f"cpu={index % 100}.5"))
+    queue.put_nowait(KeyStroke(KeyEvent.CHARACTER, "q"))
+
+    started = time.perf_counter()
+    await plot.plot.render_plot(AppSettings(height=20), plot_spec, queue)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    plot.plot.generate_plot = _slow_generate_plot
+    stdout.file = io.StringIO()
+    tracer.enable(8 * LINES)
+
+    elapsed = asyncio.run(_run())
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "trace.json"
+        tracer.write(path)
+        events = json.loads(path.read_text())["traceEvents"]
+    spans = Counter(event["name"] for event in events)
+    appended = spans["buffer append"]
+    print(
+        f"{LINES} lines in {elapsed:.2f}s: {appended} appended,"
+        f" {LINES - appended} skipped, {spans['uniplot render']} frames drawn"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,12 @@ import asyncio
 import os
 import sys
 import termios
+from collections.abc import Collection
 from dataclasses import dataclass
 from enum import Enum
 
+from plot.trace import tracer
+
 
 class KeyEvent(Enum):
     ESCAPE = "escape"
@@ -25,6 +28,7 @@ class KeyEvent(Enum):
 class KeyStroke:
     event: KeyEvent
     value: str | None = None
+    count: int = 1
 
 
 class KeyCapture:
@@ -32,14 +36,17 @@ class KeyCapture:
         self,
         queue: asyncio.Queue[KeyStroke],
         *,
-        read_chunk: int = 32,
+        read_chunk: int = 1024,
+        repeatable: Collection[tuple[KeyEvent, str | None]] = (),
     ) -> None:
         self._queue = queue
         self._read_chunk = read_chunk
+        self._repeatable = frozenset(repeatable)
         self._buffer = bytearray()
         self._running = False
         self._original_term: list[int] | None = None
         self._owns_fd = False
+        self._closed: asyncio.Future[None] | None = None
 
         self._fd: int
 
@@ -52,8 +59,6 @@ class KeyCapture:
             except OSError as exc:
                 raise RuntimeError("No TTY available for key capture") from exc
 
-        self._cancel_r, self._cancel_w = os.pipe()
-
     async def run(self) -> None:
         if self._running:
             return
@@ -61,53 +66,55 @@ class KeyCapture:
         loop = asyncio.get_running_loop()
         self._enter_raw_mode()
         self._running = True
+        self._closed = loop.create_future()
+        loop.add_reader(self._fd, self._on_readable)
 
         try:
-            while self._running:
-                chunk = await loop.run_in_executor(
-                    None,
-                    self._cancellable_read,
-                    self._fd,
-                    self._read_chunk,
-                    self._cancel_r,
-                )
-                if chunk is None:
-                    break
-                if not chunk:
-                    await self._queue.put(KeyStroke(KeyEvent.EOF))
-                    break
-
-                self._buffer.extend(chunk)
-                for stroke in self._drain_buffer():
-                    await self._queue.put(stroke)
+            await self._closed
         except asyncio.CancelledError:
-            try:
-                os.write(self._cancel_w, b"x")
-            except OSError:
-                pass
             return
         finally:
+            loop.remove_reader(self._fd)
             self._running = False
             self._restore_terminal()
 
-    @staticmethod
-    def _cancellable_read(fd: int, n: int, cancel_fd: int) -> bytes | None:
-        import select
-
-        while True:
-            r, _, _ = select.select([fd, cancel_fd], [], [])
-            if cancel_fd in r:
-                # drain cancel pipe
-                try:
-                    os.read(cancel_fd, 4096)
-                except OSError:
-                    pass
-                return None
-            if fd in r:
-                try:
-                    return os.read(fd, n)
-                except InterruptedError:
-                    continue
+    def _on_readable(self) -> None:
+        with tracer.span("key read"):
+            self._read_keys()
+
+    def _read_keys(self) -> None:
+        try:
+            chunk = os.read(self._fd, self._read_chunk)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+
+        if not chunk:
+            self._queue.put_nowait(KeyStroke(KeyEvent.EOF))
+            if self._closed is not None and not self._closed.done():
+                self._closed.set_result(None)
+            return
+
+        # Everything that piled up while the loop was busy arrives in one
+        # read, so a held key collapses into a single counted stroke here.
+        self._buffer.extend(chunk)
+        for stroke in self._coalesce(self._drain_buffer()):
+            self._queue.put_nowait(stroke)
+
+    def _coalesce(self, strokes: list[KeyStroke]) -> list[KeyStroke]:
+        merged: list[KeyStroke] = []
+        for stroke in strokes:
+            last = merged[-1] if merged else None
+            if (
+                last is not None
+                and (stroke.event, stroke.value) in self._repeatable
+                and (last.event, last.value) == (stroke.event, stroke.value)
+            ):
+                last.count += stroke.count
+                continue
+            merged.append(stroke)
+        return merged
 
     def _enter_raw_mode(self) -> None:
         if self._original_term is not None:
@@ -0,0 +1,64 @@
+import asyncio
+
+from plot.collect import InputLine
+from plot.extract import extract_timestamp
+from plot.prompts import TimestampSpec
+
+
+class InputClock:
+    """Seconds since the first sample, for the plot's x-axis.
+
+    With a timestamp spec the input's own timestamps drive the clock, so a
+    replayed log keeps its original pacing; otherwise the time each line was
+    read from stdin does.
+    Readings start at ``offset`` and never run backwards.
+    """
+
+    def __init__(self, timestamp: TimestampSpec | None, *, offset: float = 0.0):
+        self._timestamp = timestamp
+        self._offset = offset
+        self._origin: float | None = None
+        self._last = offset
+
+    def stamp(self, line: str, arrived: float) -> float | None:
+        """Raw time of ``line``; ``None`` if its timestamp is missing."""
+        if self._timestamp is None:
+            return arrived
+        return extract_timestamp(self._timestamp, line)
+
+    def advance(self, now: float) -> float:
+        """Clock reading for a sample stamped ``now`` by :meth:`stamp`."""
+        if self._origin is None:
+            self._origin = now
+        self._last = max(self._last, self._offset + now - self._origin)
+        return self._last
+
+
+async def pace_input(
+    source: asyncio.Queue[InputLine | None],
+    target: asyncio.Queue[InputLine | None],
+    timestamp: TimestampSpec,
+    speed: float,
+) -> None:
+    """Forward ``source`` to ``target``, delayed to ``speed`` x the input's timestamps."""
+    loop = asyncio.get_running_loop()
+    origin: tuple[float, float] | None = None
+
+    try:
+        while True:
+            item = await source.get()
+            if item is not None:
+                stamp = extract_timestamp(timestamp, item.text)
+                if stamp is not None and origin is None:
+                    origin = (stamp, loop.time())
+                elif stamp is not None and origin is not None:
+                    due = origin[1] + (stamp - origin[0]) / speed
+                    delay = due - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+            await target.put(item)
+            if item is None:
+                return
+    except asyncio.CancelledError:
+        return
@@ -1,9 +1,13 @@
 import asyncio
+import codecs
 import sys
-from collections.abc import AsyncIterator
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
 from typing import Literal
 
 from plot.text import remove_ansi
+from plot.trace import tracer
 
 _FRAME_BOUNDARIES: tuple[str, ...] = (
     "\x1b[2J\x1b[H",
@@ -12,6 +16,12 @@ _FRAME_BOUNDARIES: tuple[str, ...] = (
 )
 
 
+@dataclass(slots=True, frozen=True)
+class InputLine:
+    arrived: float
+    text: str
+
+
 def _find_boundary(buffer: str) -> tuple[int, str]:
     index = -1
     token = ""
@@ -26,29 +36,52 @@ def _find_boundary(buffer: str) -> tuple[int, str]:
 
 
 def _normalize(text: str) -> str:
-    cleaned = remove_ansi(text)
-    cleaned = cleaned.replace("\r", "")
-    return cleaned.strip()
+    with tracer.span("normalize"):
+        cleaned = remove_ansi(text)
+        cleaned = cleaned.replace("\r", "")
+        return cleaned.strip()
+
+
+def _read(reader: Callable[[int], bytes], size: int) -> bytes:
+    # Runs in the worker thread, so the span lands on that thread's track
+    # rather than covering the event loop while it is free to do other work.
+    with tracer.span("stdin read"):
+        return reader(size)
 
 
 async def iter_stdin_lines() -> AsyncIterator[str]:
-    """Yield lines from standard input without blocking the event loop."""
+    """Yield lines from standard input without blocking the event loop.
+
+    Input is read in chunks of whatever is available, so a file piped in
+    whole is split locally rather than with one thread hop per line.
+    """
+    reader = getattr(sys.stdin.buffer, "read1", sys.stdin.buffer.read)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pending = ""
+    prev: str | None = None
+
     try:
-        prev: str | None = None
         while True:
-            line = await asyncio.to_thread(sys.stdin.readline)
-            line = _normalize(line)
-            if line == "":
-                continue
-
-            if line == prev:
-                continue
-            prev = line
+            chunk = await asyncio.to_thread(_read, reader, 65536)
+            if not chunk:
+                break
 
-            yield line
+            with tracer.span("stdin batch"):
+                pending += decoder.decode(chunk)
+                *complete, pending = pending.split("\n")
+            for raw in complete:
+                line = _normalize(raw)
+                if line == "" or line == prev:
+                    continue
+                prev = line
+                yield line
     except (asyncio.CancelledError, GeneratorExit):
         return
 
+    line = _normalize(pending + decoder.decode(b"", final=True))
+    if line and line != prev:
+        yield line
+
 
 async def iter_stdin_frames() -> AsyncIterator[str]:
     """Yield ANSI-driven screen updates as whole frames."""
@@ -59,14 +92,15 @@ async def iter_stdin_frames() -> AsyncIterator[str]:
 
     try:
         while True:
-            chunk = await asyncio.to_thread(reader, 4096)
+            chunk = await asyncio.to_thread(_read, reader, 4096)
             if not chunk:
                 break
 
             buffer += chunk.decode(errors="ignore")
 
             while True:
-                idx, boundary = _find_boundary(buffer)
+                with tracer.span("frame split"):
+                    idx, boundary = _find_boundary(buffer)
                 if idx == -1:
                     break
 
@@ -91,13 +125,19 @@ async def iter_stdin_frames() -> AsyncIterator[str]:
 
 
 async def queue_stdin(
-    queue: asyncio.Queue[str],
+    queue: asyncio.Queue[InputLine | None],
     mode: Literal["lines", "frames"] = "lines",
 ) -> None:
-    """Read from standard input and put lines or frames into the queue."""
+    """Read from standard input and put lines or frames into the queue.
+
+    Each item carries the wall-clock time it was read, so lines that wait in
+    the queue keep their place on the x-axis. ``None`` is put once standard
+    input is exhausted.
+    """
     reader = iter_stdin_frames if mode == "frames" else iter_stdin_lines
     try:
         async for item in reader():
-            await queue.put(item)
+            await queue.put(InputLine(time.time(), item))
     except (asyncio.CancelledError, GeneratorExit):
         return
+    await queue.put(None)
@@ -0,0 +1,122 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Deque
+
+from plot.extract import match_rate
+from plot.prompts import PlotSpec
+
+Resynthesize = Callable[[list[str]], Awaitable[PlotSpec | None]]
+
+
+class DriftMonitor:
+    """Track rolling match rates per extract and re-synthesize on format drift.
+
+    Once any extract's match rate over the last ``window`` lines falls below
+    ``threshold``, the next ``sample_size`` lines are collected and handed to
+    ``resynthesize`` in a background task. A returned spec is only offered via
+    :meth:`take_spec` if it matches the fresh samples at least as well as the
+    threshold demands.
+    """
+
+    def __init__(
+        self,
+        plot_spec: PlotSpec,
+        resynthesize: Resynthesize,
+        *,
+        window: int,
+        threshold: float,
+        sample_size: int,
+    ) -> None:
+        self._resynthesize = resynthesize
+        self._window = window
+        self._threshold = threshold
+        self._sample_size = sample_size
+
+        self._rates: dict[str, Deque[bool]] = {}
+        self._samples: list[str] = []
+        self._collecting = False
+        self._task: asyncio.Task[PlotSpec | None] | None = None
+        self._ready: PlotSpec | None = None
+
+        self.reset(plot_spec)
+
+    @property
+    def active(self) -> bool:
+        """Whether a re-synthesis is being collected for or is in flight."""
+        return self._collecting or self._task is not None
+
+    def reset(self, plot_spec: PlotSpec) -> None:
+        self._rates = {ex.name: deque(maxlen=self._window) for ex in plot_spec.extracts}
+        self._samples = []
+        self._collecting = False
+
+    def observe(self, line: str, values: dict[str, dict[str, float]]) -> None:
+        for name, series in values.items():
+            rates = self._rates.get(name)
+            if rates is not None:
+                rates.append(bool(series))
+
+        if self._task is not None:
+            return
+
+        if self._collecting:
+            self._samples.append(line)
+            if len(self._samples) >= self._sample_size:
+                self._start()
+            return
+
+        if self._drifted():
+            self._collecting = True
+            self._samples = [line]
+
+    def take_spec(self) -> PlotSpec | None:
+        """Return a validated replacement spec once, if one is ready."""
+        spec, self._ready = self._ready, None
+        return spec
+
+    async def aclose(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    def _drifted(self) -> bool:
+        for rates in self._rates.values():
+            if len(rates) < self._window:
+                continue
+            if sum(rates) / len(rates) < self._threshold:
+                return True
+        return False
+
+    def _start(self) -> None:
+        samples = self._samples
+        self._samples = []
+        self._collecting = False
+        self._task = asyncio.create_task(self._resynthesize(samples))
+        self._task.add_done_callback(lambda task: self._finish(task, samples))
+
+    def _finish(
+        self,
+        task: asyncio.Task[PlotSpec | None],
+        samples: list[str],
+    ) -> None:
+        self._task = None
+        if task.cancelled() or task.exception() is not None:
+            self._clear_rates()
+            return
+
+        spec = task.result()
+        if spec is None or match_rate(spec, samples) < self._threshold:
+            self._clear_rates()
+            return
+
+        self._ready = spec
+
+    def _clear_rates(self) -> None:
+        # Require a full window of fresh observations before trying again.
+        for rates in self._rates.values():
+            rates.clear()
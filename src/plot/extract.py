@@ -0,0 +1,105 @@
+import math
+import re
+from datetime import datetime
+
+from plot.prompts import ExtractSpec, PlotSpec, TimestampSpec
+from plot.utils import as_number
+
+
+def _to_value(ex: ExtractSpec, raw: str | None) -> float | None:
+    if raw is None:
+        return None
+    try:
+        val = as_number(raw) * ex.scale
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(val):
+        return None
+    return val
+
+
+def extract_value(ex: ExtractSpec, line: str) -> float | None:
+    """Apply a single extract to ``line``; ``None`` when it does not yield a number."""
+    match = re.search(ex.regex, line)
+    if not match:
+        return None
+
+    try:
+        raw = match.group(ex.group)
+    except IndexError:
+        return None
+    return _to_value(ex, raw)
+
+
+def extract_timestamp(ts: TimestampSpec, line: str) -> float | None:
+    """Parse the timestamp ``ts`` finds in ``line`` into Unix seconds."""
+    match = re.search(ts.regex, line)
+    if not match:
+        return None
+
+    try:
+        raw = match.group(ts.group)
+        if raw is None:
+            return None
+        match ts.format:
+            case "epoch":
+                return float(raw)
+            case "epoch_ms":
+                return float(raw) / 1000
+            case "iso":
+                return datetime.fromisoformat(raw).timestamp()
+            case _:
+                return datetime.strptime(raw, ts.format).timestamp()
+    except (IndexError, OSError, OverflowError, ValueError):
+        return None
+
+
+def extract_entities(ex: ExtractSpec, frame: str) -> dict[str, float]:
+    """Apply a keyed extract to every row of ``frame`` in one ``finditer`` pass.
+
+    Each distinct key becomes its own series named ``"<name> <key>"``.
+    """
+    assert ex.key_group is not None
+
+    series: dict[str, float] = {}
+    for match in re.finditer(ex.regex, frame, re.MULTILINE):
+        try:
+            key = match.group(ex.key_group)
+            raw = match.group(ex.group)
+        except IndexError:
+            return {}
+        val = _to_value(ex, raw)
+        if key is None or val is None:
+            continue
+        series[f"{ex.name} {key.strip()}"] = val
+    return series
+
+
+def extract_values(plot_spec: PlotSpec, line: str) -> dict[str, dict[str, float]]:
+    """Apply every extract of ``plot_spec`` to ``line``.
+
+    Returns, per extract name, the series values it produced; an extract that
+    did not match maps to an empty dict.
+    """
+    values: dict[str, dict[str, float]] = {}
+    for ex in plot_spec.extracts:
+        if ex.key_group is not None:
+            values[ex.name] = extract_entities(ex, line)
+            continue
+
+        val = extract_value(ex, line)
+        values[ex.name] = {} if val is None else {ex.name: val}
+    return values
+
+
+def match_rate(plot_spec: PlotSpec, lines: list[str]) -> float:
+    """Fraction of ``lines`` for which every extract yields a number."""
+    if not lines:
+        return 0.0
+
+    matched = 0
+    for line in lines:
+        values = extract_values(plot_spec, line)
+        if all(values.values()):
+            matched += 1
+    return matched / len(lines)
@@ -0,0 +1,232 @@
+import asyncio
+import multiprocessing
+import re
+import time
+from collections import deque
+from collections.abc import Iterator
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Deque
+
+from plot.clock import InputClock
+from plot.extract import extract_values
+from plot.prompts import PlotSpec
+
+# Lengths of the synthetic character runs tried by benchmark_regex.
+# Exponential backtracking shows up within the small linear steps, so the
+# doubling steps that follow never run a pattern far past the budget. The
+# runs stay short because unanchored searches are quadratic on any long run.
+_RUN_LENGTHS: tuple[int, ...] = (4, 8, 12, 16, 20, 24, 32, 64, 128)
+
+# Real samples are also tried repeated up to this many times their length.
+_SAMPLE_REPEATS: tuple[int, ...] = (2, 4)
+
+# Slow lines of similar length tolerated before lines at least that long are
+# skipped unmatched. Strikes expire after _STRIKE_WINDOW lines, and a ban is
+# lifted after _BAN_LINES lines so the regex gets tried on long lines again.
+_STRIKES = 3
+_STRIKE_WINDOW = 1000
+_BAN_LINES = 1000
+
+# Once a spec has had a slow line, extraction runs in a child process that is
+# killed when one line takes this many times the budget.
+HARD_TIMEOUT_FACTOR = 10
+
+
+def _runs(length: int) -> Iterator[str]:
+    yield "1" * length + "!"
+    yield "1." * (length // 2) + "!"
+    yield "a" * length + "!"
+    yield " " * length + "!"
+    yield "a1 " * (length // 3) + "!"
+
+
+def _repeats(samples: list[str], times: int) -> Iterator[str]:
+    for sample in samples:
+        if not sample:
+            continue
+        repeated = sample * times
+        yield repeated
+        yield repeated[:-1] + "!"
+
+
+def _slowest(regex: re.Pattern[str], lines: Iterator[str] | list[str]) -> float:
+    worst = 0.0
+    for line in lines:
+        started = time.thread_time()
+        regex.search(line)
+        worst = max(worst, time.thread_time() - started)
+    return worst
+
+
+def benchmark_regex(
+    pattern: str,
+    samples: list[str],
+    budget: float,
+    flags: int = 0,
+) -> float:
+    """Return the slowest single ``re.search`` over samples and adversarial inputs.
+
+    Times are CPU seconds. Stops at the first input that pushes a match past
+    ``budget`` seconds. ``flags`` should be the ones extraction uses.
+    """
+    regex = re.compile(pattern, flags)
+
+    worst = _slowest(regex, [*samples, "\n".join(samples)])
+    for length in _RUN_LENGTHS:
+        if worst > budget:
+            return worst
+        worst = max(worst, _slowest(regex, _runs(length)))
+    for times in _SAMPLE_REPEATS:
+        if worst > budget:
+            return worst
+        worst = max(worst, _slowest(regex, _repeats(samples, times)))
+    return worst
+
+
+def spec_is_fast(plot_spec: PlotSpec, samples: list[str], budget: float) -> bool:
+    patterns = [
+        (ex.regex, re.MULTILINE if ex.key_group is not None else 0)
+        for ex in plot_spec.extracts
+    ]
+    if plot_spec.timestamp is not None:
+        patterns.append((plot_spec.timestamp.regex, 0))
+    return all(
+        benchmark_regex(pattern, samples, budget, flags) <= budget
+        for pattern, flags in patterns
+    )
+
+
+class RegexGuard:
+    """Count slow input lines and skip lines of a length that keeps being slow.
+
+    Callers pass the CPU time of the calling thread, so waiting for the GIL
+    or a stopped process never counts against the regex. A slow line keeps
+    its values. Once a few recent lines of similar length have been slow,
+    lines at least as long as the shortest of them are skipped for a while
+    before any regex runs on them. After the first slow line, ``struck`` is
+    set so callers can move extraction behind a hard timeout.
+    """
+
+    def __init__(self, budget: float) -> None:
+        self._budget = budget
+        self._lines = 0
+        self._strikes: Deque[tuple[int, int]] = deque(maxlen=_STRIKES)
+        self._max_length: int | None = None
+        self._ban_until = 0
+        self.struck = False
+        self.slow = 0
+
+    def reset(self) -> None:
+        self._strikes.clear()
+        self._max_length = None
+        self.struck = False
+
+    def admit(self, line: str) -> bool:
+        self._lines += 1
+        if self._max_length is None:
+            return True
+        if self._lines > self._ban_until:
+            self._max_length = None
+            return True
+        if len(line) >= self._max_length:
+            self.slow += 1
+            return False
+        return True
+
+    def record(self, line: str, elapsed: float) -> None:
+        if elapsed <= self._budget:
+            return
+
+        self.slow += 1
+        self.struck = True
+        self._strikes.append((self._lines, len(line)))
+        lengths = [
+            length
+            for seen, length in self._strikes
+            if self._lines - seen < _STRIKE_WINDOW
+        ]
+        if len(lengths) >= _STRIKES and max(lengths) <= 2 * min(lengths):
+            self._max_length = min(lengths)
+            self._ban_until = self._lines + _BAN_LINES
+            self._strikes.clear()
+
+
+Extracted = tuple[dict[str, dict[str, float]], float | None, float]
+
+
+def _serve(conn: Connection) -> None:
+    plot_spec: PlotSpec | None = None
+    clock = InputClock(None)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        match message:
+            case PlotSpec() as plot_spec:
+                clock = InputClock(plot_spec.timestamp)
+                conn.send(None)
+            case (str() as line, float() as arrived) if plot_spec is not None:
+                started = time.thread_time()
+                values = extract_values(plot_spec, line)
+                matched = values and all(values.values())
+                stamp = clock.stamp(line, arrived) if matched else None
+                conn.send((values, stamp, time.thread_time() - started))
+
+
+class IsolatedExtractor:
+    """Run extraction in a child process that is killed when a line overruns.
+
+    ``re`` cannot be interrupted mid-match, so a process boundary is the only
+    way to bound how long one catastrophically backtracking line holds up
+    the event loop. The child is started on first use and again after a
+    kill.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self._timeout = timeout
+        self._context = multiprocessing.get_context("forkserver")
+        self._process: BaseProcess | None = None
+        self._conn: Connection | None = None
+        self._plot_spec: PlotSpec | None = None
+        self.killed = 0
+
+    async def extract(
+        self, plot_spec: PlotSpec, line: str, arrived: float
+    ) -> Extracted | None:
+        """Values, time stamp and CPU time for ``line``; ``None`` if it overran."""
+        if self._conn is None:
+            self._start()
+        assert self._conn is not None
+        if plot_spec is not self._plot_spec:
+            self._conn.send(plot_spec)
+            # Also waits out the child's start-up, outside the timed window.
+            await asyncio.to_thread(self._conn.recv)
+            self._plot_spec = plot_spec
+
+        self._conn.send((line, arrived))
+        if await asyncio.to_thread(self._conn.poll, self._timeout):
+            return self._conn.recv()
+
+        self.killed += 1
+        self.close()
+        return None
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._plot_spec = None
+
+    def _start(self) -> None:
+        self._conn, child = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_serve, args=(child,), name="plot-extract", daemon=True
+        )
+        self._process.start()
+        child.close()
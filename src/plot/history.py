@@ -0,0 +1,401 @@
+import math
+import sys
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, TypeVar
+
+T = TypeVar("T")
+
+# Rough cost of one retained value: a deque slot plus a float object.
+_VALUE_BYTES = 32
+
+
+@dataclass(slots=True, frozen=True)
+class Snapshot:
+    legends: list[str]
+    series: list[list[float]]
+    times: list[float]
+    line: str
+    y_min: float
+    y_max: float
+    resolution: int
+
+
+def _window_slice(values: Deque[T], start: int, stop: int) -> list[T]:
+    """Return ``list(values)[start:stop]`` walking in from the nearer end."""
+    size = len(values)
+    if start <= size - stop:
+        return list(islice(values, start, stop))
+
+    tail = list(islice(reversed(values), size - stop, size - start))
+    tail.reverse()
+    return tail
+
+
+def _latest(stream: list[float]) -> float:
+    for value in reversed(stream):
+        if not math.isnan(value):
+            return value
+    return -math.inf
+
+
+def _has_values(stream: list[float]) -> bool:
+    return any(not math.isnan(value) for value in stream)
+
+
+def _finite(streams: list[list[float]]) -> Iterator[float]:
+    for stream in streams:
+        for value in stream:
+            if not math.isnan(value):
+                yield value
+
+
+def _step_backward(times: list[float], index: int, seconds: float) -> int:
+    if not times:
+        return index
+
+    target = times[index] - seconds
+    cursor = index
+    while cursor > 0 and times[cursor] > target:
+        cursor -= 1
+    return cursor
+
+
+def _step_forward(times: list[float], index: int, seconds: float) -> int:
+    if not times:
+        return index
+
+    target = times[index] + seconds
+    cursor = index
+    last = len(times) - 1
+    while cursor < last and times[cursor] < target:
+        cursor += 1
+    return cursor
+
+
+class _Bucket:
+    """Accumulates ``factor`` points of one tier into a point of the next."""
+
+    __slots__ = ("count", "time_sum", "sums", "counts", "lows", "highs")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.time_sum = 0.0
+        self.sums: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.lows: dict[str, float] = {}
+        self.highs: dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.count = 0
+        self.time_sum = 0.0
+        self.sums = {}
+        self.counts = {}
+        self.lows = {}
+        self.highs = {}
+
+    def add(
+        self,
+        t: float,
+        means: dict[str, float],
+        lows: dict[str, float],
+        highs: dict[str, float],
+    ) -> None:
+        self.count += 1
+        self.time_sum += t
+        for name, val in means.items():
+            if name in self.sums:
+                self.sums[name] += val
+                self.counts[name] += 1
+                self.lows[name] = min(self.lows[name], lows[name])
+                self.highs[name] = max(self.highs[name], highs[name])
+            else:
+                self.sums[name] = val
+                self.counts[name] = 1
+                self.lows[name] = lows[name]
+                self.highs[name] = highs[name]
+
+    def flush(
+        self,
+    ) -> tuple[float, dict[str, float], dict[str, float], dict[str, float]]:
+        t = self.time_sum / self.count
+        means = {name: total / self.counts[name] for name, total in self.sums.items()}
+        lows, highs = self.lows, self.highs
+        self.reset()
+        return t, means, lows, highs
+
+
+class _Tier:
+    """Time-aligned series at one resolution, trimmed to a byte budget."""
+
+    def __init__(
+        self,
+        *,
+        resolution: int,
+        max_bytes: int,
+        ttl: int | None,
+    ) -> None:
+        self.resolution = resolution
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.times: Deque[float] = deque()
+        self.means: dict[str, Deque[float]] = {}
+        self.idle: dict[str, int] = {}
+        # Series idle past the TTL are no longer padded. Their values cover
+        # only the start of ``times`` and are dropped once evicted.
+        self.expired: set[str] = set()
+
+        # Raw samples keep their source line; coarser tiers keep the range
+        # each point summarizes instead.
+        self.lines: Deque[str] | None = None
+        self.lows: dict[str, Deque[float]] = self.means
+        self.highs: dict[str, Deque[float]] = self.means
+        if resolution == 1:
+            self.lines = deque()
+        else:
+            self.lows = {}
+            self.highs = {}
+        self.line_bytes = 0
+
+    def append(
+        self,
+        t: float,
+        means: dict[str, float],
+        lows: dict[str, float],
+        highs: dict[str, float],
+        line: str | None,
+    ) -> None:
+        # Keep every live series aligned with times: series that appear late
+        # are NaN-padded, absent ones get a NaN gap and expire once idle too
+        # long.
+        for name in list(self.means):
+            if name in means or name in self.expired:
+                continue
+            self.idle[name] += 1
+            limit = self.ttl if self.ttl is not None else len(self.times)
+            if self.idle[name] > limit:
+                self._expire(name)
+                continue
+            for store in self._stores():
+                store[name].append(math.nan)
+
+        for name, val in means.items():
+            if name not in self.means or name in self.expired:
+                self.expired.discard(name)
+                for store in self._stores():
+                    values = store.setdefault(name, deque())
+                    values.extend([math.nan] * (len(self.times) - len(values)))
+            self.means[name].append(val)
+            if self.lows is not self.means:
+                self.lows[name].append(lows[name])
+                self.highs[name].append(highs[name])
+            self.idle[name] = 0
+
+        self.times.append(t)
+        if self.lines is not None and line is not None:
+            self.lines.append(line)
+            self.line_bytes += sys.getsizeof(line)
+
+        self._evict()
+
+    def _stores(self) -> tuple[dict[str, Deque[float]], ...]:
+        if self.lows is self.means:
+            return (self.means,)
+        return (self.means, self.lows, self.highs)
+
+    def window(
+        self, store: dict[str, Deque[float]], name: str, start: int, stop: int
+    ) -> list[float]:
+        """Values of ``name`` for ``times[start:stop]``, NaN where it has none."""
+        values = store[name]
+        if name not in self.expired:
+            return _window_slice(values, start, stop)
+
+        end = min(stop, len(values))
+        if end <= start:
+            return [math.nan] * (stop - start)
+        return _window_slice(values, start, end) + [math.nan] * (stop - end)
+
+    def _expire(self, name: str) -> None:
+        # The idle padding goes, the values stay visible in views of the time
+        # they cover until they are evicted.
+        del self.idle[name]
+        values = self.means[name]
+        while values and math.isnan(values[-1]):
+            for store in self._stores():
+                store[name].pop()
+        if values:
+            self.expired.add(name)
+            return
+        for store in self._stores():
+            del store[name]
+
+    def _evict(self) -> None:
+        stores = self._stores()
+        live = len(self.means) - len(self.expired)
+        per_point = _VALUE_BYTES * (1 + len(stores) * live)
+        expired_values = sum(len(self.means[name]) for name in self.expired)
+        while (
+            len(self.times) > 1
+            and len(self.times) * per_point
+            + len(stores) * expired_values * _VALUE_BYTES
+            + self.line_bytes
+            > self.max_bytes
+        ):
+            self.times.popleft()
+            for store in stores:
+                for values in store.values():
+                    if values:
+                        values.popleft()
+            expired_values -= len(self.expired)
+            for name in [name for name in self.expired if not self.means[name]]:
+                self.expired.discard(name)
+                for store in stores:
+                    del store[name]
+            if self.lines is not None:
+                self.line_bytes -= sys.getsizeof(self.lines.popleft())
+
+
+class History:
+    """Round-robin-database style sample history under a memory budget.
+
+    Tier 0 keeps raw samples; each further tier keeps min/max/mean points
+    summarizing ``factor`` points of the tier below. Half the budget goes to
+    tier 0 and every further tier gets half of what is left, so old data is
+    kept at ever coarser resolution instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        series_ttl: int,
+        tiers: int = 4,
+        factor: int = 10,
+    ) -> None:
+        self._factor = factor
+        self._tiers: list[_Tier] = []
+        remaining = max_bytes
+        for level in range(tiers):
+            share = remaining if level == tiers - 1 else remaining // 2
+            remaining -= share
+            self._tiers.append(
+                _Tier(
+                    resolution=factor**level,
+                    max_bytes=share,
+                    ttl=series_ttl if level == 0 else None,
+                )
+            )
+        self._buckets = [_Bucket() for _ in range(tiers - 1)]
+
+    def __len__(self) -> int:
+        return len(self._tiers[0].times)
+
+    @property
+    def latest(self) -> float | None:
+        times = self._tiers[0].times
+        return times[-1] if times else None
+
+    def append(self, t: float, sample: dict[str, float], line: str) -> None:
+        self._tiers[0].append(t, sample, sample, sample, line)
+        self._feed(0, t, sample, sample, sample)
+
+    def snapshot(
+        self,
+        end: float | None,
+        *,
+        window: int,
+        max_series: int,
+    ) -> Snapshot | None:
+        """Snapshot ``window`` points ending at ``end`` (``None`` for the newest).
+
+        The finest tier that holds a full window before ``end`` is used, so a
+        view far back in time is drawn from the coarser tiers.
+        """
+        picked = self._pick(end, window)
+        if picked is None:
+            return None
+        tier, stop = picked
+        start = max(0, stop - window)
+
+        legends = list(tier.means.keys())
+        series = [tier.window(tier.means, name, start, stop) for name in legends]
+
+        # Series that appeared late or went idle are NaN-padded; drop the ones
+        # with nothing to show in this window.
+        visible = [index for index, stream in enumerate(series) if _has_values(stream)]
+        if len(visible) > max_series:
+            ranked = sorted(visible, key=lambda index: _latest(series[index]))
+            visible = sorted(ranked[-max_series:])
+        legends = [legends[index] for index in visible]
+        series = [series[index] for index in visible]
+        if not series:
+            return None
+
+        lows = [tier.window(tier.lows, name, start, stop) for name in legends]
+        highs = [tier.window(tier.highs, name, start, stop) for name in legends]
+        line = tier.lines[stop - 1] if tier.lines else ""
+
+        return Snapshot(
+            legends=legends,
+            series=series,
+            times=_window_slice(tier.times, start, stop),
+            line=line,
+            y_min=min(_finite(lows)),
+            y_max=max(_finite(highs)),
+            resolution=tier.resolution,
+        )
+
+    def step(self, end: float | None, seconds: float, *, window: int) -> float | None:
+        """Move a view ending at ``end`` by ``seconds``, at least one point."""
+        picked = self._pick(end, window)
+        if picked is None:
+            return end
+        tier, stop = picked
+
+        times = list(tier.times)
+        if seconds < 0:
+            index = _step_backward(times, stop - 1, -seconds)
+        else:
+            index = _step_forward(times, stop - 1, seconds)
+        return times[index]
+
+    def _pick(self, end: float | None, window: int) -> tuple[_Tier, int] | None:
+        best: tuple[_Tier, int] | None = None
+        for tier in self._tiers:
+            if not tier.times:
+                continue
+            stop = len(tier.times) if end is None else bisect_right(tier.times, end)
+            if stop >= window:
+                return tier, stop
+            if best is None or stop > best[1]:
+                best = (tier, stop)
+
+        if best is not None and best[1] == 0:
+            # Older than anything retained: show the oldest window we have.
+            coarsest = next(tier for tier in reversed(self._tiers) if tier.times)
+            return coarsest, min(window, len(coarsest.times))
+        return best
+
+    def _feed(
+        self,
+        level: int,
+        t: float,
+        means: dict[str, float],
+        lows: dict[str, float],
+        highs: dict[str, float],
+    ) -> None:
+        if level >= len(self._buckets):
+            return
+
+        bucket = self._buckets[level]
+        bucket.add(t, means, lows, highs)
+        if bucket.count < self._factor:
+            return
+
+        t, means, lows, highs = bucket.flush()
+        self._tiers[level + 1].append(t, means, lows, highs, None)
+        self._feed(level + 1, t, means, lows, highs)
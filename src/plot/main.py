@@ -1,20 +1,29 @@
 import asyncio
 import sys
 from contextlib import suppress
+from functools import partial
 
 from openai import AsyncOpenAI
 
 from plot.capture import KeyCapture, KeyStroke
-from plot.collect import queue_stdin
+from plot.clock import pace_input
+from plot.collect import InputLine, queue_stdin
 from plot.console import stderr, stdout
-from plot.plot import render_plot
-from plot.prompts import USER_TEMPLATE, PlotSpec
+from plot.plot import NAVIGATION_KEYS, render_plot
 from plot.queue import merge_queues
 from plot.settings import AppSettings, OpenAISettings
+from plot.shared import (
+    SharedBatch,
+    SharedPublisher,
+    SharedReader,
+    poll_shared,
+    ring_capacity,
+)
+from plot.synth import synthesize_spec
+from plot.trace import tracer
 
 
-async def _main() -> None:
-    settings = AppSettings()
+async def _main(settings: AppSettings) -> None:
     openai = OpenAISettings()
 
     client = AsyncOpenAI(
@@ -22,9 +31,9 @@ async def _main() -> None:
         base_url=openai.base_url,
     )
 
-    samples: list[str] = []
+    samples: list[InputLine] = []
 
-    piped_input_queue = asyncio.Queue[str]()
+    piped_input_queue = asyncio.Queue[InputLine | None]()
     mode = "frames" if settings.frame_stream else "lines"
     piped_input_task = asyncio.create_task(queue_stdin(piped_input_queue, mode))
 
@@ -37,6 +46,8 @@ async def _main() -> None:
                 while len(samples) < settings.sample_size:
                     sample = await piped_input_queue.get()
                     if sample is None:
+                        # Leave the end-of-input marker for render_plot.
+                        piped_input_queue.put_nowait(None)
                         break
                     samples.append(sample)
         except TimeoutError:
@@ -45,46 +56,152 @@ async def _main() -> None:
             )
             sys.exit(1)
 
-    with stdout.status("[bold green]Synthesizing regex pattern...", spinner="dots"):
-        response = await client.beta.chat.completions.parse(
-            model=settings.model,
-            reasoning_effort="minimal" if "gpt-5" in settings.model else None,
-            messages=[
-                {
-                    "role": "user",
-                    "content": USER_TEMPLATE.format(
-                        samples="\n".join(f"- {s}" for s in samples),
-                        extra=settings.prompt,
-                    ),
-                },
-            ],
-            response_format=PlotSpec,
-        )
+    # Lines arriving while the requests are in flight score the candidates
+    # and are plotted with the samples once a spec is chosen.
+    arrived: list[InputLine] = []
+    held_out: list[str] = []
+
+    async def collect_held_out() -> None:
+        while True:
+            item = await piped_input_queue.get()
+            if item is None:
+                piped_input_queue.put_nowait(None)
+                return
+            arrived.append(item)
+            held_out.append(item.text)
+
+    held_out_task = asyncio.create_task(collect_held_out())
+    try:
+        with stdout.status("[bold green]Synthesizing regex pattern...", spinner="dots"):
+            plot_spec = await synthesize_spec(
+                client, settings, [sample.text for sample in samples], held_out
+            )
+    finally:
+        held_out_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await held_out_task
 
-    plot_spec = response.choices[0].message.parsed
     if plot_spec is None:
-        stderr.print("[red]Error:[/red] No function call in response.")
+        stderr.print("[red]Error:[/red] No usable regex candidate in responses.")
         sys.exit(1)
 
+    publisher: SharedPublisher | None = None
+    if settings.publish is not None:
+        try:
+            publisher = SharedPublisher(
+                settings.publish,
+                plot_spec,
+                capacity=ring_capacity(settings.max_memory * 1024 * 1024),
+                series_ttl=settings.series_ttl,
+            )
+        except FileExistsError:
+            stderr.print(
+                f"[red]Error:[/red] {settings.publish!r} is already published."
+            )
+            sys.exit(1)
+
+    if settings.speed is not None and plot_spec.timestamp is None:
+        stderr.print(
+            "[yellow]Warning:[/yellow] --speed ignored: no timestamp was found in the input."
+        )
+
     key_stoke_queue = asyncio.Queue[KeyStroke]()
-    key_capture = KeyCapture(key_stoke_queue)
+    key_capture = KeyCapture(key_stoke_queue, repeatable=NAVIGATION_KEYS)
     key_capture_task = asyncio.create_task(key_capture.run())
 
+    input_queue = piped_input_queue
+    pace_task: asyncio.Task[None] | None = None
+    if settings.speed is not None and plot_spec.timestamp is not None:
+        input_queue = asyncio.Queue[InputLine | None]()
+        pace_task = asyncio.create_task(
+            pace_input(
+                piped_input_queue,
+                input_queue,
+                plot_spec.timestamp,
+                settings.speed,
+            )
+        )
+
+    # The learn-phase samples and whatever arrived during synthesis are
+    # plotted in one pass before live input; paced input keeps its timing.
+    backlog = samples + arrived
+    if pace_task is None:
+        while not piped_input_queue.empty():
+            pending = piped_input_queue.get_nowait()
+            if pending is None:
+                piped_input_queue.put_nowait(None)
+                break
+            backlog.append(pending)
+
     act_queue, act_producer_task = await merge_queues(
-        piped_input_queue,
+        input_queue,
         key_stoke_queue,
     )
 
     try:
-        await render_plot(settings, plot_spec, act_queue)
+        await render_plot(
+            settings,
+            plot_spec,
+            act_queue,
+            resynthesize=partial(synthesize_spec, client, settings),
+            publisher=publisher,
+            backlog=backlog,
+        )
     finally:
         key_capture_task.cancel()
-        for task in (key_capture_task, piped_input_task, act_producer_task):
+        tasks = [key_capture_task, piped_input_task, act_producer_task]
+        if pace_task is not None:
+            tasks.append(pace_task)
+        for task in tasks:
             task.cancel()
-        for task in (key_capture_task, piped_input_task, act_producer_task):
+        for task in tasks:
             with suppress(asyncio.CancelledError):
                 await task
+        if publisher is not None:
+            publisher.close()
+
+
+async def _attach(settings: AppSettings, name: str) -> None:
+    try:
+        reader = SharedReader(name)
+    except (FileNotFoundError, ValueError):
+        stderr.print(f"[red]Error:[/red] Nothing is published as {name!r}.")
+        sys.exit(1)
+    assert reader.plot_spec is not None
+
+    shared_queue = asyncio.Queue[SharedBatch | None]()
+    poll_task = asyncio.create_task(poll_shared(reader, shared_queue, settings.refresh))
+
+    key_stoke_queue = asyncio.Queue[KeyStroke]()
+    key_capture = KeyCapture(key_stoke_queue, repeatable=NAVIGATION_KEYS)
+    key_capture_task = asyncio.create_task(key_capture.run())
+
+    act_queue, act_producer_task = await merge_queues(
+        shared_queue,
+        key_stoke_queue,
+    )
+
+    try:
+        await render_plot(settings, reader.plot_spec, act_queue)
+    finally:
+        tasks = [key_capture_task, poll_task, act_producer_task]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        reader.close()
 
 
 def main() -> None:
-    asyncio.run(_main())
+    settings = AppSettings()
+    if settings.trace is not None:
+        tracer.enable(settings.trace_events)
+    try:
+        if settings.attach is not None:
+            asyncio.run(_attach(settings, settings.attach))
+        else:
+            asyncio.run(_main(settings))
+    finally:
+        if settings.trace is not None:
+            tracer.write(settings.trace)
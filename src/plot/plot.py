@@ -1,19 +1,35 @@
 import asyncio
-import re
-import shutil
+import math
 import time
-from collections import deque
-from typing import Deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import partial
 
-from rich.live import Live
-from rich.text import Text
 from uniplot import plot_to_string
 
 from plot.capture import KeyEvent, KeyStroke
-from plot.console import stderr, stdout
+from plot.clock import InputClock
+from plot.collect import InputLine
+from plot.console import stdout
+from plot.drift import DriftMonitor, Resynthesize
+from plot.extract import extract_values
+from plot.guard import HARD_TIMEOUT_FACTOR, IsolatedExtractor, RegexGuard
+from plot.history import History, Snapshot
 from plot.prompts import PlotSpec
+from plot.render import RenderWorker
+from plot.screen import DiffScreen
 from plot.settings import AppSettings
-from plot.utils import as_number
+from plot.shared import SharedBatch, SharedPublisher
+from plot.terminal import TerminalGeometry, TerminalResize
+from plot.trace import tracer
+
+# Held navigation keys are coalesced by KeyCapture into one counted stroke.
+NAVIGATION_KEYS: frozenset[tuple[KeyEvent, str | None]] = frozenset(
+    {
+        (KeyEvent.CHARACTER, "h"),
+        (KeyEvent.CHARACTER, "l"),
+    }
+)
 
 
 def generate_plot(
@@ -26,16 +42,12 @@ def generate_plot(
     y_min: float | None = None,
     y_max: float | None = None,
     y_unit: str = "",
+    width: int = 80,
 ) -> str:
     t = list(time)
     xs = [t[:] for _ in series]
     ys = series
 
-    unit_length = len(y_unit) + 1 if y_unit else 0
-    max_y_length = max(len(str(y)) for s in series for y in s) if series else 0
-
-    right_padding = unit_length + max_y_length + 1
-
     return plot_to_string(
         xs=xs,
         ys=ys,
@@ -43,7 +55,7 @@ def generate_plot(
         legend_labels=legends,
         color=True,
         lines=True,
-        width=shutil.get_terminal_size((80, 24)).columns - right_padding,
+        width=width,
         height=height,
         x_unit="s",
         y_unit=y_unit,
@@ -56,305 +68,514 @@ def generate_plot(
 def _append_sample(
     *,
     line: str,
-    plot_spec: PlotSpec,
-    start_time: float,
-    buffers: dict[str, Deque[float]],
-    time_queue: Deque[float],
-    line_queue: Deque[str],
+    values: dict[str, dict[str, float]],
+    stamp: float | None,
+    clock: InputClock,
+    history: History,
+    publisher: SharedPublisher | None = None,
 ) -> bool:
-    values: dict[str, float] = {}
-    missing: list[str] = []
-
-    for ex in plot_spec.extracts:
-        match = re.search(ex.regex, line)
-        if not match:
-            missing.append(ex.name)
-            return False
-
-        raw = match.group(ex.group)
-        val = as_number(raw) * ex.scale
-        values[ex.name] = val
-
-    if not values:
-        stderr.print("[yellow]No match in sample[/yellow]")
+    if not values or not all(values.values()) or stamp is None:
         return False
 
-    if len(values) != len(plot_spec.extracts):
-        missing_labels = ", ".join(missing)
-        stderr.print(
-            f"[yellow]Partial match; missing:[/yellow] {missing_labels or 'unknown'}"
-        )
-        return False
+    elapsed = clock.advance(stamp)
 
-    for name, val in values.items():
-        buffers[name].append(val)
-
-    elapsed = time.time() - start_time
-    time_queue.append(elapsed)
-    line_queue.append(line)
+    sample = {name: val for series in values.values() for name, val in series.items()}
+    with tracer.span("buffer append"):
+        history.append(elapsed, sample, line)
+    if publisher is not None:
+        publisher.write(elapsed, sample)
 
     return True
 
 
-def _series_snapshot(
+async def _extract(
+    *,
+    plot_spec: PlotSpec,
+    clock: InputClock,
+    guard: RegexGuard,
+    isolated: IsolatedExtractor,
+    frame: str,
+    arrived: float,
+) -> tuple[dict[str, dict[str, float]], float | None] | None:
+    """Values and time stamp of ``frame``; ``None`` if the guard skips it.
+
+    The timestamp regex comes from the model as well, so it is timed
+    together with the extracts. Once the spec has had a slow line, this
+    runs in a child process that is killed if the line overruns.
+    """
+    if not guard.admit(frame):
+        return None
+
+    with tracer.span("extract"):
+        if guard.struck:
+            extracted = await isolated.extract(plot_spec, frame, arrived)
+            if extracted is None:
+                guard.record(frame, math.inf)
+                return None
+            values, stamp, elapsed = extracted
+        else:
+            started = time.thread_time()
+            values = extract_values(plot_spec, frame)
+            matched = values and all(values.values())
+            stamp = clock.stamp(frame, arrived) if matched else None
+            elapsed = time.thread_time() - started
+    guard.record(frame, elapsed)
+    return values, stamp
+
+
+async def _ingest_backlog(
     *,
-    buffers: dict[str, Deque[float]],
-    time_queue: Deque[float],
-    line_queue: Deque[str],
-    end_index: int | None,
-    window: int,
-) -> tuple[list[str], list[list[float]], list[float], str]:
-    times = list(time_queue)
-    if not times:
-        return [], [], [], ""
-
-    final_index = len(times) - 1 if end_index is None else end_index
-    final_index = max(0, min(final_index, len(times) - 1))
-    start_index = max(0, final_index - window + 1)
-
-    legends = list(buffers.keys())
-    materialized = {name: list(series) for name, series in buffers.items()}
-    series = [materialized[name][start_index : final_index + 1] for name in legends]
-    time_slice = times[start_index : final_index + 1]
-    lines = list(line_queue)
-    line = lines[final_index] if lines else ""
-
-    return legends, series, time_slice, line
+    backlog: Sequence[InputLine],
+    plot_spec: PlotSpec,
+    clock: InputClock,
+    history: History,
+    guard: RegexGuard,
+    isolated: IsolatedExtractor,
+    publisher: SharedPublisher | None = None,
+) -> int:
+    """Extract and append ``backlog`` without drawing; return the unmatched count."""
+    unmatched = 0
+    for item in backlog:
+        extracted = await _extract(
+            plot_spec=plot_spec,
+            clock=clock,
+            guard=guard,
+            isolated=isolated,
+            frame=item.text,
+            arrived=item.arrived,
+        )
+        if extracted is None:
+            continue
+        values, stamp = extracted
+        if not _append_sample(
+            line=item.text,
+            values=values,
+            stamp=stamp,
+            clock=clock,
+            history=history,
+            publisher=publisher,
+        ):
+            unmatched += 1
+    return unmatched
+
+
+def _y_label_width(series: list[list[float]], y_unit: str) -> int:
+    unit_length = len(y_unit) + 1 if y_unit else 0
+    max_y_length = max(len(str(y)) for s in series for y in s) if series else 0
+    return unit_length + max_y_length
+
+
+def _span_name(event: object) -> str:
+    match event:
+        case InputLine():
+            return "sample"
+        case KeyStroke():
+            return "key handling"
+        case TerminalResize():
+            return "resize"
+        case SharedBatch():
+            return "shared batch"
+        case _:
+            return "end of input"
+
+
+@dataclass(slots=True, frozen=True)
+class _Frame:
+    title: str
+    snapshot: Snapshot
+    y_unit: str
+    height: int
+    status: str
+
+
+def _draw_frame(
+    frame: _Frame, *, screen: DiffScreen, geometry: TerminalGeometry
+) -> None:
+    snapshot = frame.snapshot
+    layout = geometry.layout(_y_label_width(snapshot.series, frame.y_unit))
+
+    with tracer.span("uniplot render"):
+        rendered_plot = generate_plot(
+            title=frame.title,
+            legends=snapshot.legends,
+            series=snapshot.series,
+            time=snapshot.times,
+            height=frame.height,
+            y_min=snapshot.y_min,
+            y_max=snapshot.y_max,
+            y_unit=frame.y_unit,
+            width=layout.plot_width,
+        )
+    status_line = layout.status_line(frame.status)
 
+    rendered = f"{rendered_plot}\n\n{snapshot.line}\n\n{status_line}"
+    screen.update(rendered, columns=geometry.columns, lines=geometry.lines)
 
-def _render_view(
+
+def _build_frame(
     *,
-    live: Live,
     settings: AppSettings,
     plot_spec: PlotSpec,
-    buffers: dict[str, Deque[float]],
-    time_queue: Deque[float],
-    line_queue: Deque[str],
-    end_index: int | None,
+    history: History,
+    end: float | None,
     paused: bool,
-) -> None:
-    legends, series, times, line = _series_snapshot(
-        buffers=buffers,
-        time_queue=time_queue,
-        line_queue=line_queue,
-        end_index=end_index,
-        window=settings.window,
-    )
-
-    if not times or not series:
-        return
-
-    flat_values = [value for stream in series for value in stream]
-    y_min = min(flat_values) if flat_values else None
-    y_max = max(flat_values) if flat_values else None
+    unmatched: int = 0,
+    slow: int = 0,
+    resynthesizing: bool = False,
+) -> _Frame | None:
+    with tracer.span("snapshot"):
+        snapshot = history.snapshot(
+            end,
+            window=settings.window,
+            max_series=settings.max_series,
+        )
+    if snapshot is None:
+        return None
 
     y_unit = next(
         (ex.unit for ex in plot_spec.extracts if ex.unit), plot_spec.unit or ""
     )
 
-    rendered_plot = generate_plot(
-        title=plot_spec.title,
-        legends=legends,
-        series=series,
-        time=times,
-        height=settings.height,
-        y_min=y_min,
-        y_max=y_max,
-        y_unit=y_unit,
-    )
-
     if paused:
         status = " [PAUSED] "
     else:
         status = " [RUNNING] "
-    terminal_width = shutil.get_terminal_size((80, 24)).columns
-    status_line = status.center(terminal_width)
-
-    rendered = f"{rendered_plot}\n\n{line}\n\n{status_line}"
-    renderable = Text.from_ansi(rendered)
-    live.update(renderable, refresh=True)
-
-
-def _step_backward(times: list[float], index: int, seconds: float) -> int:
-    if not times:
-        return index
-
-    target = times[index] - seconds
-    cursor = index
-    while cursor > 0 and times[cursor] > target:
-        cursor -= 1
-    return cursor
-
+    if snapshot.resolution > 1:
+        status += f"[1:{snapshot.resolution}] "
+    if resynthesizing:
+        status += "[RESYNTHESIZING] "
+    if unmatched:
+        status += f"unmatched: {unmatched} "
+    if slow:
+        status += f"slow: {slow} "
+
+    # The snapshot holds copies of the window, so drawing it on the render
+    # thread never races with appends here.
+    return _Frame(
+        title=plot_spec.title,
+        snapshot=snapshot,
+        y_unit=y_unit,
+        height=settings.height,
+        status=status,
+    )
 
-def _step_forward(times: list[float], index: int, seconds: float) -> int:
-    if not times:
-        return index
 
-    target = times[index] + seconds
-    cursor = index
-    last = len(times) - 1
-    while cursor < last and times[cursor] < target:
-        cursor += 1
-    return cursor
+def _render_view(
+    *,
+    worker: RenderWorker[_Frame],
+    settings: AppSettings,
+    plot_spec: PlotSpec,
+    history: History,
+    end: float | None,
+    paused: bool,
+    unmatched: int = 0,
+    slow: int = 0,
+    resynthesizing: bool = False,
+) -> None:
+    # The snapshot is taken once the worker is free to draw it, so a burst
+    # of lines builds one frame per draw rather than one per line.
+    worker.request(
+        partial(
+            _build_frame,
+            settings=settings,
+            plot_spec=plot_spec,
+            history=history,
+            end=end,
+            paused=paused,
+            unmatched=unmatched,
+            slow=slow,
+            resynthesizing=resynthesizing,
+        )
+    )
 
 
 async def render_plot(
     settings: AppSettings,
     plot_spec: PlotSpec,
-    act_queue: asyncio.Queue[str | KeyStroke],
+    act_queue: asyncio.Queue[
+        InputLine | SharedBatch | KeyStroke | TerminalResize | None
+    ],
+    *,
+    resynthesize: Resynthesize | None = None,
+    publisher: SharedPublisher | None = None,
+    backlog: Sequence[InputLine] = (),
 ) -> None:
-    start_time = time.time()
-
-    history_size = settings.window * 1000
+    clock = InputClock(plot_spec.timestamp)
 
-    buffers: dict[str, Deque[float]] = {}
-    for ex in plot_spec.extracts:
-        buffers[ex.name] = deque(maxlen=history_size)
-    time_queue: Deque[float] = deque(maxlen=history_size)
-    line_queue: Deque[str] = deque(maxlen=history_size)
+    history = History(
+        max_bytes=settings.max_memory * 1024 * 1024,
+        series_ttl=settings.series_ttl,
+    )
 
     paused = False
-    view_index: int | None = None
-
-    with Live(console=stdout, auto_refresh=False) as live:
-        while True:
-            line = await act_queue.get()
-
-            match line:
-                case str() as frame:
-                    was_full = (
-                        time_queue.maxlen is not None
-                        and len(time_queue) == time_queue.maxlen
-                    )
-                    if not _append_sample(
-                        line=frame,
-                        plot_spec=plot_spec,
-                        start_time=start_time,
-                        buffers=buffers,
-                        time_queue=time_queue,
-                        line_queue=line_queue,
-                    ):
-                        continue
-
-                    if paused:
-                        if not time_queue:
-                            view_index = None
+    ended = False
+    view_end: float | None = None
+    guard = RegexGuard(settings.regex_budget)
+    isolated = IsolatedExtractor(settings.regex_budget * HARD_TIMEOUT_FACTOR)
+
+    drift: DriftMonitor | None = None
+    if resynthesize is not None:
+        drift = DriftMonitor(
+            plot_spec,
+            resynthesize,
+            window=settings.drift_window,
+            threshold=settings.drift_threshold,
+            sample_size=settings.sample_size + settings.holdout_size,
+        )
+
+    geometry = TerminalGeometry()
+    geometry.attach(act_queue)
+
+    try:
+        with (
+            DiffScreen(stdout.file) as screen,
+            RenderWorker(
+                partial(_draw_frame, screen=screen, geometry=geometry),
+                screen.invalidate,
+                asyncio.get_running_loop().call_soon_threadsafe,
+            ) as worker,
+        ):
+            # Lines that queued up before the first frame are drawn once, not
+            # one redraw per line.
+            with tracer.span("backlog"):
+                unmatched = await _ingest_backlog(
+                    backlog=backlog,
+                    plot_spec=plot_spec,
+                    clock=clock,
+                    history=history,
+                    guard=guard,
+                    isolated=isolated,
+                    publisher=publisher,
+                )
+            if history and not settings.replay:
+                _render_view(
+                    worker=worker,
+                    settings=settings,
+                    plot_spec=plot_spec,
+                    history=history,
+                    end=None,
+                    paused=False,
+                    unmatched=unmatched,
+                    slow=guard.slow,
+                )
+
+            while True:
+                line = await act_queue.get()
+
+                with tracer.span(_span_name(line)):
+                    match line:
+                        case InputLine(text=frame, arrived=arrived):
+                            extracted = await _extract(
+                                plot_spec=plot_spec,
+                                clock=clock,
+                                guard=guard,
+                                isolated=isolated,
+                                frame=frame,
+                                arrived=arrived,
+                            )
+                            if extracted is None:
+                                continue
+                            values, stamp = extracted
+
+                            was_resynthesizing = drift is not None and drift.active
+                            if drift is not None:
+                                drift.observe(frame, values)
+                                new_spec = drift.take_spec()
+                                if new_spec is not None:
+                                    # Series of the old spec go idle and expire.
+                                    if new_spec.timestamp != plot_spec.timestamp:
+                                        clock = InputClock(
+                                            new_spec.timestamp,
+                                            offset=history.latest or 0.0,
+                                        )
+                                    plot_spec = new_spec
+                                    if publisher is not None:
+                                        publisher.set_spec(plot_spec)
+                                    drift.reset(plot_spec)
+                                    guard.reset()
+                                    values = extract_values(plot_spec, frame)
+                                    stamp = clock.stamp(frame, arrived)
+                            resynthesizing = drift is not None and drift.active
+
+                            if not _append_sample(
+                                line=frame,
+                                values=values,
+                                stamp=stamp,
+                                clock=clock,
+                                history=history,
+                                publisher=publisher,
+                            ):
+                                unmatched += 1
+                                # Non-matching lines never redraw on their own, so
+                                # surface a re-synthesis starting or failing here.
+                                if not paused and resynthesizing != was_resynthesizing:
+                                    _render_view(
+                                        worker=worker,
+                                        settings=settings,
+                                        plot_spec=plot_spec,
+                                        history=history,
+                                        end=None,
+                                        paused=False,
+                                        unmatched=unmatched,
+                                        slow=guard.slow,
+                                        resynthesizing=resynthesizing,
+                                    )
+                                continue
+
+                            # A paused view is pinned to a point in time, so new
+                            # samples and evictions never shift it.
+                            if paused:
+                                continue
+                            # Replay builds the whole history first and draws once
+                            # the input is exhausted.
+                            if settings.replay and not ended:
+                                continue
+
+                            _render_view(
+                                worker=worker,
+                                settings=settings,
+                                plot_spec=plot_spec,
+                                history=history,
+                                end=None,
+                                paused=False,
+                                unmatched=unmatched,
+                                slow=guard.slow,
+                                resynthesizing=resynthesizing,
+                            )
+
+                        case SharedBatch(samples=samples, plot_spec=shared_spec):
+                            if shared_spec is not None:
+                                plot_spec = shared_spec
+                            with tracer.span("buffer append"):
+                                for t, sample in samples:
+                                    history.append(t, sample, "")
+                            if paused or not history:
+                                continue
+                            _render_view(
+                                worker=worker,
+                                settings=settings,
+                                plot_spec=plot_spec,
+                                history=history,
+                                end=None,
+                                paused=False,
+                            )
+
+                        case None:
+                            ended = True
+                            if history:
+                                _render_view(
+                                    worker=worker,
+                                    settings=settings,
+                                    plot_spec=plot_spec,
+                                    history=history,
+                                    end=view_end,
+                                    paused=paused,
+                                    unmatched=unmatched,
+                                    slow=guard.slow,
+                                    resynthesizing=drift is not None and drift.active,
+                                )
+                            continue
+                        case TerminalResize():
+                            geometry.acknowledge()
+                            worker.invalidate()
+                            if history:
+                                _render_view(
+                                    worker=worker,
+                                    settings=settings,
+                                    plot_spec=plot_spec,
+                                    history=history,
+                                    end=view_end,
+                                    paused=paused,
+                                    unmatched=unmatched,
+                                    slow=guard.slow,
+                                    resynthesizing=drift is not None and drift.active,
+                                )
+                            continue
+                        case (
+                            KeyStroke(event=KeyEvent.CTRL_C)
+                            | KeyStroke(event=KeyEvent.ESCAPE)
+                        ):
+                            return
+                        case KeyStroke(event=KeyEvent.CHARACTER, value="q"):
+                            return
+                        case KeyStroke(event=KeyEvent.CHARACTER, value=" "):
+                            paused = not paused
+                            view_end = history.latest if paused else None
+                            if history:
+                                _render_view(
+                                    worker=worker,
+                                    settings=settings,
+                                    plot_spec=plot_spec,
+                                    history=history,
+                                    end=view_end,
+                                    paused=paused,
+                                    unmatched=unmatched,
+                                    slow=guard.slow,
+                                    resynthesizing=drift is not None and drift.active,
+                                )
+                            continue
+                        case KeyStroke(event=KeyEvent.ENTER):
+                            if not paused:
+                                continue
+                            paused = False
+                            view_end = None
+                            if history:
+                                _render_view(
+                                    worker=worker,
+                                    settings=settings,
+                                    plot_spec=plot_spec,
+                                    history=history,
+                                    end=None,
+                                    paused=False,
+                                    unmatched=unmatched,
+                                    slow=guard.slow,
+                                    resynthesizing=drift is not None and drift.active,
+                                )
                             continue
+                        case KeyStroke(event=KeyEvent.CHARACTER, value="h") as stroke:
+                            if not paused or not history:
+                                continue
+
+                            view_end = history.step(
+                                view_end, -1.0 * stroke.count, window=settings.window
+                            )
 
-                        if view_index is None:
-                            view_index = len(time_queue) - 1
-                        if was_full and view_index is not None and view_index > 0:
-                            view_index -= 1
-                        if view_index is not None and view_index >= len(time_queue):
-                            view_index = len(time_queue) - 1
-                        continue
-
-                    _render_view(
-                        live=live,
-                        settings=settings,
-                        plot_spec=plot_spec,
-                        buffers=buffers,
-                        time_queue=time_queue,
-                        line_queue=line_queue,
-                        end_index=None,
-                        paused=False,
-                    )
-
-                case KeyStroke(event=KeyEvent.CTRL_C) | KeyStroke(
-                    event=KeyEvent.ESCAPE
-                ):
-                    return
-                case KeyStroke(event=KeyEvent.CHARACTER, value="q"):
-                    return
-                case KeyStroke(event=KeyEvent.CHARACTER, value=" "):
-                    paused = not paused
-                    if paused:
-                        if time_queue:
-                            view_index = len(time_queue) - 1
                             _render_view(
-                                live=live,
+                                worker=worker,
                                 settings=settings,
                                 plot_spec=plot_spec,
-                                buffers=buffers,
-                                time_queue=time_queue,
-                                line_queue=line_queue,
-                                end_index=view_index,
+                                history=history,
+                                end=view_end,
                                 paused=True,
+                                unmatched=unmatched,
+                                slow=guard.slow,
+                                resynthesizing=drift is not None and drift.active,
+                            )
+                            continue
+                        case KeyStroke(event=KeyEvent.CHARACTER, value="l") as stroke:
+                            if not paused or not history:
+                                continue
+
+                            view_end = history.step(
+                                view_end, 1.0 * stroke.count, window=settings.window
                             )
-                        else:
-                            view_index = None
-                    else:
-                        view_index = None
-                        if time_queue:
+
                             _render_view(
-                                live=live,
+                                worker=worker,
                                 settings=settings,
                                 plot_spec=plot_spec,
-                                buffers=buffers,
-                                time_queue=time_queue,
-                                line_queue=line_queue,
-                                end_index=None,
-                                paused=False,
+                                history=history,
+                                end=view_end,
+                                paused=True,
+                                unmatched=unmatched,
+                                slow=guard.slow,
+                                resynthesizing=drift is not None and drift.active,
                             )
-                    continue
-                case KeyStroke(event=KeyEvent.ENTER):
-                    if not paused:
-                        continue
-                    paused = False
-                    view_index = None
-                    if time_queue:
-                        _render_view(
-                            live=live,
-                            settings=settings,
-                            plot_spec=plot_spec,
-                            buffers=buffers,
-                            time_queue=time_queue,
-                            line_queue=line_queue,
-                            end_index=None,
-                            paused=False,
-                        )
-                    continue
-                case KeyStroke(event=KeyEvent.CHARACTER, value="h"):
-                    if not paused or not time_queue:
-                        continue
-
-                    if view_index is None:
-                        view_index = len(time_queue) - 1
-
-                    times = list(time_queue)
-                    view_index = _step_backward(times, view_index, 1.0)
-
-                    _render_view(
-                        live=live,
-                        settings=settings,
-                        plot_spec=plot_spec,
-                        buffers=buffers,
-                        time_queue=time_queue,
-                        line_queue=line_queue,
-                        end_index=view_index,
-                        paused=True,
-                    )
-                    continue
-                case KeyStroke(event=KeyEvent.CHARACTER, value="l"):
-                    if not paused or not time_queue:
-                        continue
-
-                    if view_index is None:
-                        view_index = len(time_queue) - 1
-
-                    times = list(time_queue)
-                    view_index = _step_forward(times, view_index, 1.0)
-
-                    _render_view(
-                        live=live,
-                        settings=settings,
-                        plot_spec=plot_spec,
-                        buffers=buffers,
-                        time_queue=time_queue,
-                        line_queue=line_queue,
-                        end_index=view_index,
-                        paused=True,
-                    )
-                    continue
-                case KeyStroke() as ke:
-                    continue
+                            continue
+                        case KeyStroke() as ke:
+                            continue
+    finally:
+        geometry.detach()
+        isolated.close()
+        if drift is not None:
+            await drift.aclose()
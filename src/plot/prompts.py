@@ -6,6 +6,20 @@ USER_TEMPLATE = """Samples:
 Extra instruction: {extra}
 """
 
+# Appended to the extra instruction of each concurrent candidate request so
+# the candidates explore different regex shapes.
+CANDIDATE_HINTS: tuple[str, ...] = (
+    "",
+    "Anchor each regex on the label or unit that sits next to the number.",
+    "Prefer the simplest regex that matches every sample; avoid nested quantifiers.",
+)
+
+# Added when every candidate was rejected for catastrophic backtracking.
+SLOW_REGEX_HINT = (
+    "Earlier regexes backtracked catastrophically. Do not nest quantifiers, "
+    "avoid overlapping alternatives and leading '.*', and anchor on literal text."
+)
+
 
 class ExtractSpec(BaseModel):
     name: str = Field(
@@ -24,6 +38,15 @@ class ExtractSpec(BaseModel):
         description="Capturing group index that holds the numeric token.",
         examples=[1],
     )
+    key_group: NonNegativeInt | None = Field(
+        default=None,
+        description=(
+            "For tables with one row per entity (e.g., one container per row in docker stats), "
+            "the capturing group index holding the entity name. The regex is then applied to "
+            "every row and each distinct entity becomes its own series. Leave unset otherwise."
+        ),
+        examples=[None, 1],
+    )
     unit: str | None = Field(
         default=None,
         description="Optional unit label for this series (used for y-axis label if set).",
@@ -36,6 +59,28 @@ class ExtractSpec(BaseModel):
     )
 
 
+class TimestampSpec(BaseModel):
+    regex: str = Field(
+        description=(
+            "Python regex that isolates the timestamp each sample carries. "
+            "Use a capturing group around the timestamp text."
+        ),
+        examples=[r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?)"],
+    )
+    group: NonNegativeInt = Field(
+        default=1,
+        description="Capturing group index that holds the timestamp text.",
+        examples=[1],
+    )
+    format: str = Field(
+        description=(
+            "How to parse the captured text: 'iso' for ISO 8601, 'epoch' for Unix "
+            "seconds, 'epoch_ms' for Unix milliseconds, or a Python strptime format."
+        ),
+        examples=["iso", "epoch", "%d/%b/%Y:%H:%M:%S"],
+    )
+
+
 class PlotSpec(BaseModel):
     title: str = Field(
         description=(
@@ -61,6 +106,13 @@ class PlotSpec(BaseModel):
         ),
         examples=["Used Memory (MiB)", "Response Time (ms)", "Error Rate (%)"],
     )
+    timestamp: TimestampSpec | None = Field(
+        default=None,
+        description=(
+            "Optional timestamp extraction used as the x-axis clock. "
+            "Set it only when every sample carries its own timestamp."
+        ),
+    )
     unit: str | None = Field(
         default=None,
         description=(
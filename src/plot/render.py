@@ -0,0 +1,147 @@
+import threading
+from collections.abc import Callable
+from types import TracebackType
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class RenderWorker(Generic[T]):
+    """Draw frames on a dedicated thread, building each only once it can be drawn.
+
+    :meth:`request` never blocks on drawing. While a frame is being drawn,
+    only the latest ``build`` callable is kept, and it runs once the worker
+    is free: ``schedule`` (usually the event loop's ``call_soon_threadsafe``)
+    hands it back to the requesting thread. A slow terminal therefore skips
+    intermediate frames without paying for building them. The worker owns
+    the screen while running; ``invalidate`` runs on the worker thread
+    before the next draw. Frames must be immutable once built.
+    """
+
+    def __init__(
+        self,
+        draw: Callable[[T], None],
+        invalidate: Callable[[], None],
+        schedule: Callable[[Callable[[], None]], object],
+    ) -> None:
+        self._draw = draw
+        self._invalidate = invalidate
+        self._schedule = schedule
+        self._cond = threading.Condition()
+        self._pending: T | None = None
+        self._deferred: Callable[[], T | None] | None = None
+        self._busy = False
+        self._invalidate_pending = False
+        self._closing = False
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="plot-render", daemon=True
+        )
+        self.dropped = 0
+
+    def __enter__(self) -> "RenderWorker[T]":
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        # The last requested frame is drawn even if the worker is still busy.
+        if exc_type is None:
+            self._flush()
+        self.close()
+
+    def request(self, build: Callable[[], T | None]) -> None:
+        """Draw the frame ``build`` returns, calling it once the worker is free."""
+        self._raise_error()
+        with self._cond:
+            if self._busy:
+                if self._deferred is not None:
+                    self.dropped += 1
+                self._deferred = build
+                return
+            # This frame supersedes one waiting for a flush still queued.
+            self._deferred = None
+        frame = build()
+        if frame is not None:
+            self.submit(frame)
+
+    def submit(self, frame: T) -> None:
+        self._raise_error()
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = frame
+            self._busy = True
+            self._cond.notify()
+
+    def invalidate(self) -> None:
+        """Clear the screen before the next frame is drawn."""
+        self._raise_error()
+        with self._cond:
+            self._invalidate_pending = True
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Draw the last pending frame, then stop the worker."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _flush(self) -> None:
+        with self._cond:
+            build, self._deferred = self._deferred, None
+        if build is None:
+            return
+        frame = build()
+        if frame is not None:
+            self.submit(frame)
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: (
+                            self._pending is not None
+                            or self._invalidate_pending
+                            or self._closing
+                        )
+                    )
+                    frame, self._pending = self._pending, None
+                    invalidate, self._invalidate_pending = (
+                        self._invalidate_pending,
+                        False,
+                    )
+                    closing = self._closing
+
+                if invalidate:
+                    self._invalidate()
+                if frame is not None:
+                    self._draw(frame)
+
+                with self._cond:
+                    if self._pending is None:
+                        self._busy = False
+                    ready = (
+                        not self._busy
+                        and self._deferred is not None
+                        and not self._closing
+                    )
+                if ready:
+                    self._schedule(self._flush)
+                if closing and frame is None and not invalidate:
+                    return
+        except BaseException as error:
+            self._error = error
@@ -0,0 +1,134 @@
+import re
+from types import TracebackType
+from typing import TextIO
+
+from plot.trace import tracer
+
+_ANSI_ESCAPE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+RESET = "\x1b[0m"
+
+
+def _crop(row: str, columns: int) -> str:
+    """Cut ``row`` to ``columns`` visible cells, keeping ANSI escapes intact."""
+    if len(row) <= columns:
+        return row
+    if "\x1b" not in row:
+        return row[:columns]
+
+    parts: list[str] = []
+    visible = 0
+    position = 0
+    for match in _ANSI_ESCAPE.finditer(row):
+        text = row[position : match.start()]
+        if visible + len(text) >= columns:
+            parts.append(text[: columns - visible])
+            return "".join(parts) + RESET
+        parts.append(text)
+        parts.append(match.group(0))
+        visible += len(text)
+        position = match.end()
+
+    parts.append(row[position:][: columns - visible])
+    return "".join(parts) + RESET
+
+
+class DiffScreen:
+    """Redraw a block of terminal rows, rewriting only the rows that changed.
+
+    The block starts at the cursor position on the first update and grows
+    downward. Between updates the cursor is parked at the start of the
+    block's last row, so every change is reached with relative cursor moves
+    and written straight to ``stream`` as raw ANSI text.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._rows: list[str] = []
+        self._height = 1
+        self._cursor = 0
+        self.frames = 0
+        self.bytes_written = 0
+
+    def __enter__(self) -> "DiffScreen":
+        self._write(HIDE_CURSOR)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        out: list[str] = []
+        if self._rows:
+            self._move(out, self._height - 1)
+            out.append("\n")
+        out.append(SHOW_CURSOR)
+        self._write("".join(out))
+
+    def invalidate(self) -> None:
+        """Clear the block and repaint everything on the next update."""
+        out: list[str] = []
+        if self._rows:
+            self._move(out, 0)
+            out.append("\r" + CLEAR_BELOW)
+        self._rows = []
+        self._height = 1
+        self._cursor = 0
+        self._write("".join(out))
+
+    def update(self, text: str, *, columns: int, lines: int) -> None:
+        with tracer.span("screen diff"):
+            out = self._diff(text, columns=columns, lines=lines)
+        with tracer.span("terminal write"):
+            self._write(out)
+
+    def _diff(self, text: str, *, columns: int, lines: int) -> str:
+        rows = [_crop(row, columns) for row in text.split("\n")[: max(1, lines)]]
+        out: list[str] = []
+
+        for index, row in enumerate(rows):
+            if index < len(self._rows) and self._rows[index] == row:
+                continue
+            self._move(out, index)
+            out.append("\r" + row + CLEAR_LINE)
+
+        # Rows the new frame no longer uses are blanked, not removed, so the
+        # block keeps its height and the parked cursor stays where it is.
+        for index in range(len(rows), len(self._rows)):
+            if self._rows[index]:
+                self._move(out, index)
+                out.append("\r" + CLEAR_LINE)
+        rows.extend("" for _ in range(len(rows), len(self._rows)))
+
+        self._move(out, len(rows) - 1)
+        out.append("\r")
+
+        self._rows = rows
+        self.frames += 1
+        return "".join(out)
+
+    def _move(self, out: list[str], row: int) -> None:
+        if row >= self._height:
+            # Only newlines scroll the terminal, so grow the block with them.
+            if self._cursor < self._height - 1:
+                out.append(f"\x1b[{self._height - 1 - self._cursor}B")
+            out.append("\n" * (row - self._height + 1))
+            self._height = row + 1
+        elif row < self._cursor:
+            out.append(f"\x1b[{self._cursor - row}A")
+        elif row > self._cursor:
+            out.append(f"\x1b[{row - self._cursor}B")
+        self._cursor = row
+
+    def _write(self, data: str) -> None:
+        if not data:
+            return
+        self.bytes_written += len(data.encode())
+        self._stream.write(data)
+        self._stream.flush()
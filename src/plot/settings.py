@@ -1,4 +1,13 @@
-from pydantic import AliasChoices, Field, PositiveInt, SecretStr
+from pathlib import Path
+
+from pydantic import (
+    AliasChoices,
+    Field,
+    NonNegativeInt,
+    PositiveInt,
+    SecretStr,
+    model_validator,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -32,6 +41,21 @@ class AppSettings(BaseSettings):
         description="Number of initial non-empty lines to learn from.",
         validation_alias=AliasChoices("s", "sample-size"),
     )
+    holdout_size: NonNegativeInt = Field(
+        default=3,
+        description="Lines arriving during synthesis used to score regex candidates.",
+    )
+    candidates: PositiveInt = Field(
+        default=3,
+        description="Number of regex candidates requested concurrently.",
+        validation_alias=AliasChoices("c", "candidates"),
+    )
+    accept_rate: float = Field(
+        default=0.9,
+        ge=0,
+        le=1,
+        description="Held-out match rate a candidate needs to be used right away.",
+    )
     window: PositiveInt = Field(
         default=200,
         description="Sliding window length for plotted values.",
@@ -42,6 +66,18 @@ class AppSettings(BaseSettings):
         description="Additional instruction to steer regex generation.",
         validation_alias=AliasChoices("p", "prompt"),
     )
+    max_memory: PositiveInt = Field(
+        default=64,
+        description="Memory budget in MiB for retained history; older samples are downsampled.",
+    )
+    max_series: PositiveInt = Field(
+        default=10,
+        description="Maximum number of series drawn at once; the largest recent values win.",
+    )
+    series_ttl: PositiveInt = Field(
+        default=100,
+        description="Samples a per-entity series may go unseen before it is dropped.",
+    )
     height: PositiveInt = Field(
         default=30,
         description="Height of the plot in terminal rows.",
@@ -67,3 +103,53 @@ class AppSettings(BaseSettings):
         description="Interpret ANSI screen refresh sequences as frame-sized samples.",
         validation_alias=AliasChoices("f", "frame-stream"),
     )
+    regex_budget: float = Field(
+        default=0.005,
+        gt=0,
+        description=(
+            "CPU seconds extraction may spend on one line before it counts as slow. "
+            "After the first slow line, extraction runs in a child process that is "
+            "killed when a line takes 10x this, and that line is skipped."
+        ),
+    )
+    replay: bool = Field(
+        default=False,
+        description="Ingest all input at full speed and draw once it is exhausted.",
+    )
+    speed: float | None = Field(
+        default=None,
+        gt=0,
+        description="Replay input at this multiple of the pace of its own timestamps.",
+    )
+    publish: str | None = Field(
+        default=None,
+        description="Also publish extracted samples to a shared-memory ring with this name.",
+    )
+    attach: str | None = Field(
+        default=None,
+        description="View the samples published under this name instead of reading stdin.",
+    )
+    trace: Path | None = Field(
+        default=None,
+        description="Write per-stage timing spans to this file as Chrome trace-event JSON.",
+    )
+    trace_events: PositiveInt = Field(
+        default=100_000,
+        description="Most recent spans kept in memory for --trace.",
+    )
+    drift_window: PositiveInt = Field(
+        default=50,
+        description="Number of recent samples used to track each series' match rate.",
+    )
+    drift_threshold: float = Field(
+        default=0.5,
+        ge=0,
+        le=1,
+        description="Match rate below which the regex is re-synthesized in the background.",
+    )
+
+    @model_validator(mode="after")
+    def _check_shared_mode(self) -> "AppSettings":
+        if self.publish is not None and self.attach is not None:
+            raise ValueError("--publish and --attach cannot be used together.")
+        return self
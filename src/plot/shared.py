@@ -0,0 +1,259 @@
+import asyncio
+import json
+import math
+import struct
+from array import array
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from plot.prompts import PlotSpec
+
+# magic, version, columns, closed, capacity, write cursor, meta seq, meta length
+_HEADER = struct.Struct("<4sIIIQQQQ")
+_MAGIC = b"PLOT"
+_VERSION = 1
+_CURSOR_OFFSET = 24
+_META_SEQ_OFFSET = 32
+_META_SIZE = 64 * 1024
+_DATA_OFFSET = _HEADER.size + _META_SIZE
+
+# Series slots in one ring. A series beyond this waits for a slot whose
+# series has been idle for longer than the series TTL.
+MAX_COLUMNS = 64
+
+_U64 = struct.Struct("<Q")
+
+
+@dataclass(slots=True, frozen=True)
+class SharedBatch:
+    samples: list[tuple[float, dict[str, float]]]
+    plot_spec: PlotSpec | None = None
+
+
+def ring_capacity(max_bytes: int, columns: int = MAX_COLUMNS) -> int:
+    """Slots that fit in ``max_bytes`` with one time and ``columns`` values each."""
+    return max(1, (max_bytes - _DATA_OFFSET) // (8 * (1 + columns)))
+
+
+class _Ring:
+    def __init__(self, shm: SharedMemory, capacity: int, columns: int) -> None:
+        self._shm = shm
+        self.capacity = capacity
+        self.columns = columns
+        times_end = _DATA_OFFSET + 8 * capacity
+        self._times = shm.buf[_DATA_OFFSET:times_end].cast("d")
+        self._values = shm.buf[times_end : times_end + 8 * capacity * columns].cast("d")
+
+    def _u64(self, offset: int) -> int:
+        return _U64.unpack_from(self._shm.buf, offset)[0]
+
+    def _set_u64(self, offset: int, value: int) -> None:
+        _U64.pack_into(self._shm.buf, offset, value)
+
+    def _release(self) -> None:
+        self._times.release()
+        self._values.release()
+        self._shm.close()
+
+
+class SharedPublisher(_Ring):
+    """Writes extracted samples into a named shared-memory ring for viewers.
+
+    Each slot holds a time and one value per column; the header carries the
+    write cursor and a JSON block with the plot spec and column names.
+    Viewers attached with :class:`SharedReader` only ever read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        plot_spec: PlotSpec,
+        *,
+        capacity: int,
+        series_ttl: int,
+        columns: int = MAX_COLUMNS,
+    ) -> None:
+        size = _DATA_OFFSET + 8 * capacity * (1 + columns)
+        super().__init__(
+            SharedMemory(name=name, create=True, size=size), capacity, columns
+        )
+        _HEADER.pack_into(
+            self._shm.buf, 0, _MAGIC, _VERSION, columns, 0, capacity, 0, 0, 0
+        )
+        self._series_ttl = series_ttl
+        self._plot_spec = plot_spec
+        self._names: list[str | None] = [None] * columns
+        self._born = [0] * columns
+        self._index: dict[str, int] = {}
+        self._last_seen = [0] * columns
+        self._cursor = 0
+        self._row = array("d", [math.nan] * columns)
+        self._write_meta()
+
+    def set_spec(self, plot_spec: PlotSpec) -> None:
+        self._plot_spec = plot_spec
+        self._write_meta()
+
+    def write(self, t: float, sample: dict[str, float]) -> None:
+        row = array("d", self._row)
+        renamed = False
+        for name, val in sample.items():
+            column = self._index.get(name)
+            if column is None:
+                column = self._assign(name)
+                if column is None:
+                    continue
+                renamed = True
+            row[column] = val
+            self._last_seen[column] = self._cursor
+        if renamed:
+            self._write_meta()
+
+        slot = self._cursor % self.capacity
+        self._times[slot] = t
+        start = slot * self.columns
+        self._values[start : start + self.columns] = row
+        self._cursor += 1
+        self._set_u64(_CURSOR_OFFSET, self._cursor)
+
+    def close(self) -> None:
+        struct.pack_into("<I", self._shm.buf, 12, 1)
+        self._release()
+        self._shm.unlink()
+
+    def _assign(self, name: str) -> int | None:
+        free = [column for column, owner in enumerate(self._names) if owner is None]
+        if free:
+            column = free[0]
+        else:
+            column = min(range(self.columns), key=self._last_seen.__getitem__)
+            if self._cursor - self._last_seen[column] <= self._series_ttl:
+                return None
+            del self._index[self._names[column]]
+
+        # Readers ignore values written to the column before this cursor, so
+        # rows of the evicted series are never read under the new name.
+        self._names[column] = name
+        self._born[column] = self._cursor
+        self._index[name] = column
+        return column
+
+    def _write_meta(self) -> None:
+        meta = json.dumps(
+            {
+                "spec": self._plot_spec.model_dump(mode="json"),
+                "columns": self._names,
+                "born": self._born,
+            }
+        ).encode()
+        if len(meta) > _META_SIZE:
+            raise ValueError("Shared plot metadata does not fit in the ring header.")
+
+        # Seqlock: an odd sequence number marks the block as being rewritten.
+        seq = self._u64(_META_SEQ_OFFSET)
+        self._set_u64(_META_SEQ_OFFSET, seq + 1)
+        self._set_u64(_META_SEQ_OFFSET + 8, len(meta))
+        self._shm.buf[_HEADER.size : _HEADER.size + len(meta)] = meta
+        self._set_u64(_META_SEQ_OFFSET, seq + 2)
+
+
+class SharedReader(_Ring):
+    """Read-only view of a ring created by :class:`SharedPublisher`."""
+
+    def __init__(self, name: str) -> None:
+        # Viewers must not unlink the segment when they exit.
+        shm = SharedMemory(name=name, track=False)
+        magic, version, columns, _, capacity, *_ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            shm.close()
+            raise ValueError(f"Shared memory {name!r} is not a plot ring.")
+        super().__init__(shm, capacity, columns)
+        self._meta_seq = -1
+        self._names: list[str | None] = []
+        self._born: list[int] = []
+        self._cursor = 0
+        self.plot_spec: PlotSpec | None = None
+        self._read_meta()
+
+    @property
+    def closed(self) -> bool:
+        return struct.unpack_from("<I", self._shm.buf, 12)[0] == 1
+
+    def read(self) -> SharedBatch:
+        """Samples written since the last read, oldest first."""
+        cursor = self._u64(_CURSOR_OFFSET)
+        start = max(self._cursor, cursor - self.capacity)
+        rows: list[tuple[int, float, list[float]]] = []
+        for index in range(start, cursor):
+            slot = index % self.capacity
+            offset = slot * self.columns
+            rows.append(
+                (
+                    index,
+                    self._times[slot],
+                    self._values[offset : offset + self.columns].tolist(),
+                )
+            )
+
+        # Names are read after the rows: the publisher renames a column before
+        # writing the rows that use the new name, and values older than the
+        # rename are dropped below.
+        changed = self._read_meta()
+
+        # Slots the writer lapped while they were being copied are dropped.
+        oldest = self._u64(_CURSOR_OFFSET) - self.capacity + 1
+        samples: list[tuple[float, dict[str, float]]] = []
+        for index, t, values in rows:
+            if index < oldest:
+                continue
+            sample = {
+                name: val
+                for name, born, val in zip(self._names, self._born, values)
+                if name is not None and index >= born and not math.isnan(val)
+            }
+            if sample:
+                samples.append((t, sample))
+        self._cursor = cursor
+
+        return SharedBatch(samples, self.plot_spec if changed else None)
+
+    def close(self) -> None:
+        self._release()
+
+    def _read_meta(self) -> bool:
+        while True:
+            seq = self._u64(_META_SEQ_OFFSET)
+            if seq == self._meta_seq:
+                return False
+            if seq % 2:
+                continue
+            length = self._u64(_META_SEQ_OFFSET + 8)
+            raw = bytes(self._shm.buf[_HEADER.size : _HEADER.size + length])
+            if self._u64(_META_SEQ_OFFSET) != seq:
+                continue
+            break
+
+        meta: dict[str, Any] = json.loads(raw)
+        self._meta_seq = seq
+        self._names = meta["columns"]
+        self._born = meta["born"]
+        self.plot_spec = PlotSpec.model_validate(meta["spec"])
+        return True
+
+
+async def poll_shared(
+    reader: SharedReader,
+    queue: asyncio.Queue[SharedBatch | None],
+    interval: float,
+) -> None:
+    """Queue a batch of new samples every ``interval`` seconds until closed."""
+    while True:
+        closed = reader.closed
+        batch = reader.read()
+        if batch.samples or batch.plot_spec is not None:
+            await queue.put(batch)
+        if closed:
+            await queue.put(None)
+            return
+        await asyncio.sleep(interval)
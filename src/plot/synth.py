@@ -0,0 +1,220 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+
+from openai import AsyncOpenAI
+
+from plot.extract import extract_values
+from plot.guard import spec_is_fast
+from plot.prompts import CANDIDATE_HINTS, SLOW_REGEX_HINT, USER_TEMPLATE, PlotSpec
+from plot.settings import AppSettings
+
+
+@dataclass(slots=True, frozen=True)
+class SpecScore:
+    match_rate: float
+    sane_rate: float
+    line_cost: float
+
+    def passes(self, accept_rate: float) -> bool:
+        return self.match_rate >= accept_rate and self.sane_rate >= accept_rate
+
+    def rank(self) -> tuple[float, float, float]:
+        return (self.match_rate, self.sane_rate, -self.line_cost)
+
+
+def _cut_from_number(text: str, start: int, end: int) -> bool:
+    """Whether ``text[start:end]`` is only part of a longer number."""
+    before = text[start - 1 : start]
+    after = text[end : end + 1]
+    if before.isdigit() or after.isdigit():
+        return True
+    if after == "." and text[end + 1 : end + 2].isdigit():
+        return True
+    return before == "." and text[start - 2 : start - 1].isdigit()
+
+
+def _captures_whole_numbers(plot_spec: PlotSpec, line: str) -> bool:
+    for ex in plot_spec.extracts:
+        if ex.key_group is not None:
+            matches = list(re.finditer(ex.regex, line, re.MULTILINE))
+        else:
+            match = re.search(ex.regex, line)
+            matches = [match] if match else []
+        for match in matches:
+            try:
+                start, end = match.span(ex.group)
+            except IndexError:
+                continue
+            if start != -1 and _cut_from_number(line, start, end):
+                return False
+    return True
+
+
+def score_spec(plot_spec: PlotSpec, lines: list[str]) -> SpecScore:
+    """Score ``plot_spec`` on ``lines`` by match rate, value sanity and cost.
+
+    ``sane_rate`` is the fraction of matched lines whose captures are whole
+    numbers, not digits cut out of a longer one such as the ``0`` of
+    ``0.5``, and whose series did not all collapse onto the same captured
+    number, which usually means the regexes are too loose to tell the series
+    apart.
+    """
+    if not lines:
+        return SpecScore(match_rate=0.0, sane_rate=0.0, line_cost=0.0)
+
+    matched: list[tuple[str, dict[str, dict[str, float]]]] = []
+    started = time.perf_counter()
+    for line in lines:
+        values = extract_values(plot_spec, line)
+        if all(values.values()):
+            matched.append((line, values))
+    elapsed = time.perf_counter() - started
+
+    sane = 0
+    for line, values in matched:
+        numbers = [val for series in values.values() for val in series.values()]
+        if len(numbers) > 1 and len(set(numbers)) == 1:
+            continue
+        if _captures_whole_numbers(plot_spec, line):
+            sane += 1
+
+    return SpecScore(
+        match_rate=len(matched) / len(lines),
+        sane_rate=sane / len(matched) if matched else 0.0,
+        line_cost=elapsed / len(lines),
+    )
+
+
+def _compiles(plot_spec: PlotSpec) -> bool:
+    patterns = [ex.regex for ex in plot_spec.extracts]
+    if plot_spec.timestamp is not None:
+        patterns.append(plot_spec.timestamp.regex)
+    try:
+        for pattern in patterns:
+            re.compile(pattern)
+    except re.error:
+        return False
+    return True
+
+
+async def _request_spec(
+    client: AsyncOpenAI,
+    settings: AppSettings,
+    samples: list[str],
+    hint: str,
+) -> PlotSpec | None:
+    extra = " ".join(part for part in (settings.prompt, hint) if part)
+    response = await client.beta.chat.completions.parse(
+        model=settings.model,
+        reasoning_effort="minimal" if "gpt-5" in settings.model else None,
+        messages=[
+            {
+                "role": "user",
+                "content": USER_TEMPLATE.format(
+                    samples="\n".join(f"- {s}" for s in samples),
+                    extra=extra,
+                ),
+            },
+        ],
+        response_format=PlotSpec,
+    )
+    return response.choices[0].message.parsed
+
+
+async def _race_candidates(
+    client: AsyncOpenAI,
+    settings: AppSettings,
+    train: list[str],
+    held_out: list[str],
+    hints: list[str],
+) -> tuple[PlotSpec | None, bool]:
+    """Return the winning candidate and whether any was rejected as too slow.
+
+    ``held_out`` may still be growing while the requests are in flight; each
+    candidate is scored on the first ``holdout_size`` lines there when it
+    completes, or on ``train`` while there are none.
+    """
+    tasks = [
+        asyncio.create_task(_request_spec(client, settings, train, hint))
+        for hint in hints
+    ]
+
+    best: tuple[SpecScore, PlotSpec] | None = None
+    error: BaseException | None = None
+    rejected_slow = False
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                spec = await next_done
+            except Exception as exc:
+                error = error or exc
+                continue
+            # A malformed regex only disqualifies its own candidate.
+            if spec is None or not _compiles(spec):
+                continue
+
+            scored = held_out[: settings.holdout_size] or train
+            if not spec_is_fast(spec, train + scored, settings.regex_budget):
+                rejected_slow = True
+                continue
+
+            score = score_spec(spec, scored)
+            if score.passes(settings.accept_rate):
+                return spec, rejected_slow
+            if best is None or score.rank() > best[0].rank():
+                best = (score, spec)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if best is not None and best[0].match_rate > 0:
+        return best[1], rejected_slow
+    if error is not None and not rejected_slow:
+        raise error
+    return None, rejected_slow
+
+
+async def synthesize_spec(
+    client: AsyncOpenAI,
+    settings: AppSettings,
+    samples: list[str],
+    arrivals: list[str] | None = None,
+) -> PlotSpec | None:
+    """Ask the model for a ``PlotSpec`` that extracts values from ``samples``.
+
+    The first ``sample_size`` samples go into the prompt and the rest are held
+    out for scoring. With ``arrivals``, all of ``samples`` go into the prompt
+    and candidates are scored on the lines the caller appends to
+    ``arrivals`` while the requests are in flight, so synthesis never waits
+    for held-out lines. ``candidates`` requests run concurrently with
+    different prompt hints; the first one to pass on the held-out lines wins
+    and the others are cancelled. Otherwise the best-scoring candidate is
+    returned.
+
+    Candidates whose regexes exceed ``regex_budget`` on the samples or on
+    backtracking-prone inputs are discarded. If that leaves nothing, the
+    candidates are requested once more with the hint against nested
+    quantifiers.
+    """
+    if arrivals is None:
+        train = samples[: settings.sample_size]
+        held_out = samples[settings.sample_size :]
+    else:
+        train, held_out = samples, arrivals
+
+    hints = [
+        CANDIDATE_HINTS[index % len(CANDIDATE_HINTS)]
+        for index in range(settings.candidates)
+    ]
+    spec, rejected_slow = await _race_candidates(
+        client, settings, train, held_out, hints
+    )
+    if spec is not None or not rejected_slow:
+        return spec
+
+    hints = [" ".join(filter(None, (hint, SLOW_REGEX_HINT))) for hint in hints]
+    spec, _ = await _race_candidates(client, settings, train, held_out, hints)
+    return spec
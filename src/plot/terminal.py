@@ -0,0 +1,88 @@
+import asyncio
+import shutil
+import signal
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True, frozen=True)
+class TerminalResize:
+    columns: int
+    lines: int
+
+
+@dataclass(slots=True)
+class Layout:
+    columns: int
+    plot_width: int
+    right_padding: int
+    _status: str = ""
+    _status_line: str = ""
+
+    def status_line(self, status: str) -> str:
+        if status != self._status:
+            self._status = status
+            self._status_line = status.center(self.columns)
+        return self._status_line
+
+
+class TerminalGeometry:
+    """Terminal size cached between ``SIGWINCH`` signals.
+
+    On resize a single :class:`TerminalResize` is queued until the consumer
+    calls :meth:`acknowledge`, so a burst of signals reflows only once.
+    """
+
+    def __init__(self, fallback: tuple[int, int] = (80, 24)) -> None:
+        self._fallback = fallback
+        self._size = shutil.get_terminal_size(fallback)
+        self._layout: Layout | None = None
+        self._layout_key: tuple[int, int] | None = None
+        self._queue: asyncio.Queue[Any] | None = None
+        self._pending = False
+
+    @property
+    def columns(self) -> int:
+        return self._size.columns
+
+    @property
+    def lines(self) -> int:
+        return self._size.lines
+
+    def attach(self, queue: asyncio.Queue[Any]) -> None:
+        loop = asyncio.get_running_loop()
+        self._queue = queue
+        loop.add_signal_handler(signal.SIGWINCH, self._on_resize)
+
+    def detach(self) -> None:
+        if self._queue is None:
+            return
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGWINCH)
+        self._queue = None
+
+    def acknowledge(self) -> None:
+        self._pending = False
+
+    def layout(self, y_label_width: int) -> Layout:
+        """Layout for the current size and a y-axis label ``y_label_width`` wide."""
+        key = (self.columns, y_label_width)
+        if self._layout is None or self._layout_key != key:
+            right_padding = y_label_width + 1
+            self._layout = Layout(
+                columns=self.columns,
+                plot_width=self.columns - right_padding,
+                right_padding=right_padding,
+            )
+            self._layout_key = key
+        return self._layout
+
+    def _on_resize(self) -> None:
+        size = shutil.get_terminal_size(self._fallback)
+        if size == self._size:
+            return
+        self._size = size
+
+        if self._queue is None or self._pending:
+            return
+        self._pending = True
+        self._queue.put_nowait(TerminalResize(size.columns, size.lines))
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Deque
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_events", "_name", "_started")
+
+    def __init__(self, events: Deque[tuple[str, int, int, int]], name: str) -> None:
+        self._events = events
+        self._name = name
+        self._started = 0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        ended = time.perf_counter_ns()
+        self._events.append(
+            (
+                self._name,
+                self._started,
+                ended - self._started,
+                threading.get_native_id(),
+            )
+        )
+
+
+class Tracer:
+    """Records pipeline stage spans into a bounded ring of Chrome trace events.
+
+    Disabled, :meth:`span` hands out one shared no-op context manager, so
+    instrumented code pays for a method call and nothing else.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._events: Deque[tuple[str, int, int, int]] = deque()
+
+    def enable(self, capacity: int) -> None:
+        self._events = deque(maxlen=capacity)
+        self.enabled = True
+
+    def span(self, name: str) -> _Span | _NullSpan:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self._events, name)
+
+    def write(self, path: Path) -> None:
+        """Write the recorded spans as Chrome trace-event JSON."""
+        pid = os.getpid()
+        events: list[dict[str, Any]] = [
+            {
+                "name": name,
+                "cat": "plot",
+                "ph": "X",
+                "ts": started / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, started, duration, tid in self._events
+        ]
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+
+tracer = Tracer()